@@ -20,6 +20,13 @@ Name nodes:
     * `qual_name`: `node.value` (`tuple`) holds a sequence of `name` and `tpl_args` nodes,
       possibly ending in a `ctor`, `dtor` or `operator` node
     * `abi`: `node.value` holds a name node, `node.qual` (`frozenset`) holds a set of ABI tags
+    * `local_name`: `node.func` holds the function or name node of the enclosing function,
+      `node.entity` holds the name node of the entity local to it, `node.disc` (`int`) holds
+      its discriminator, or `None`
+    * `string_literal`: the entity of a `local_name` node for a string literal
+    * `unnamed_type`: `node.value` (`int`) holds the 1-based index of an unnamed type
+    * `closure`: `node.arg_tys` (`tuple`) holds a sequence of type nodes specifying
+      the arguments of a lambda, `node.index` (`int`) holds its 1-based index
 
 Type nodes:
     * `name` and `qual_name` specify a type by its name
@@ -33,32 +40,114 @@ Type nodes:
       `node.ret_ty` holds a type node specifying the return type of a template function,
       if any, or `None`, ``node.arg_tys` (`tuple`) holds a sequence of type nodes
       specifying thefunction arguments
+    * `decltype`: `node.value` holds an expression node
+
+Expression nodes:
+    * `literal`, `name` and `qual_name` nodes, and `tpl_param` nodes where they are not
+      substituted by the template arguments
+    * `func_param`: `node.value` (`int`) holds the 1-based index of a function parameter
+    * `unary`, `postfix`, `binary` and `ternary`: `node.op` (`str`) holds the operator,
+      `node.operands` (`tuple`) holds a sequence of expression nodes
+    * `member`: `node.op` is `"."` or `"->"`, `node.operands` holds an expression node
+      and a name node
+    * `call`: `node.operands` holds the callee and the argument expression nodes
+    * `cast`: `node.op` holds the name of a C++ cast such as `"static_cast"`,
+      `node.operands` holds a type node and an expression node
+    * `conversion`: `node.operands` holds a type node followed by expression nodes
+    * `keyword`: `node.op` is one of `"sizeof"`, `"alignof"`, `"typeid"`, `"noexcept"`,
+      or `"throw"`, `node.operands` holds a type or expression node, if any
+    * `sizeof_pack` and `pack_expansion`: `node.operands` holds an expression node
+    * `new`: `node.op` is `"new"` or `"new[]"`, prefixed with `"::"` for the global
+      operator, `node.operands` holds an `expr_list` node with the placement arguments,
+      a type node, and an `expr_list` node with the initializer, if any
+    * `expr_list`: `node.operands` holds a sequence of expression nodes, `node.op` holds
+      the brackets around them, `"()"` or `"{}"`, or `None`
 
 Special nodes:
     * `vtable`, `vtt`, `typeinfo`, and `typeinfo_name`: `node.value` holds a type node
       specifying the type described by this RTTI data structure
-    * `nonvirt_thunk`, `virt_thunk`: `node.value` holds a function node specifying
-      the function to which the thunk dispatches
+    * `nonvirt_thunk`, `virt_thunk`, `covariant_thunk`: `node.value` holds a function node
+      specifying the function to which the thunk dispatches
+    * `extended_temporary`: `node.value` holds the name node of the reference bound to
+      a lifetime-extended temporary, `node.index` (`int`) holds its index
 """
 
 import re
-from collections import namedtuple
+import sys
+import time
+import threading
+from bisect import bisect_left
+from collections import namedtuple, OrderedDict
+
+
+class _Span:
+    """
+    The identifier `raw[start:end]`, which is only copied into a `str` when it is rendered,
+    formatted or hashed, or when another span is compared with it. Comparing it with a `str`
+    does not copy it.
+    """
+
+    __slots__ = ('raw', 'start', 'end', '_value')
+
+    def __init__(self, raw, start, end):
+        self.raw = raw
+        self.start = start
+        self.end = end
+        self._value = None
+
+    def __str__(self):
+        if self._value is None:
+            self._value = self.raw[self.start:self.end]
+        return self._value
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return len(other) == self.end - self.start and \
+                self.raw.startswith(other, self.start)
+        elif isinstance(other, _Span):
+            if other.end - other.start != self.end - self.start:
+                return False
+            return self.raw.startswith(str(other), self.start)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def startswith(self, prefix):
+        return self.raw.startswith(prefix, self.start, self.end)
 
 
 class _Cursor:
-    def __init__(self, raw, pos=0):
+    def __init__(self, raw, pos=0, spans=False):
         self._raw = raw
         self._pos = pos
         self._substs = {}
+        self.spans = spans
 
     def at_end(self):
         return self._pos == len(self._raw)
 
     def accept(self, delim):
-        if self._raw[self._pos:self._pos + len(delim)] == delim:
+        if self._raw.startswith(delim, self._pos):
             self._pos += len(delim)
             return True
 
+    def peek(self, delim):
+        return self._raw.startswith(delim, self._pos)
+
     def advance(self, amount):
         if self._pos + amount > len(self._raw):
             return None
@@ -66,6 +155,13 @@ class _Cursor:
         self._pos += amount
         return result
 
+    def advance_span(self, amount):
+        if self._pos + amount > len(self._raw):
+            return None
+        result = _Span(self._raw, self._pos, self._pos + amount)
+        self._pos += amount
+        return result
+
     def advance_until(self, delim):
         new_pos = self._raw.find(delim, self._pos)
         if new_pos == -1:
@@ -94,13 +190,272 @@ class _Cursor:
                                         self._pos)
 
 
-class Node(namedtuple('Node', 'kind value')):
+class RenderCache:
+    """
+    A bounded LRU cache of rendered subtrees. While a cache is active (see `__enter__`),
+    `str()` of a template argument list looks it up in the cache first, so argument lists
+    that recur across a batch of symbols (e.g. the `<char, std::char_traits<char>, ...>` of
+    `std::basic_string`) are rendered only once. Nodes are compared by value, so equal
+    subtrees from different parses share an entry.
+
+    Only `tpl_args` nodes are cached: other subtrees are either cheap to render or rarely
+    repeat, and hashing them costs more than rendering them again.
+
+    The `hits`, `misses` and `evictions` counters accumulate until `clear()` is called.
+
+    A cache is active only in the thread that entered it, and must not be shared between
+    threads; use one cache per thread instead.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def render(self, node):
+        try:
+            result = self._entries[node]
+        except KeyError:
+            pass
+        else:
+            # re-inserted to move it to the end; `move_to_end` is not available on Python 2
+            self._entries[node] = self._entries.pop(node)
+            self.hits += 1
+            if _metrics is not None:
+                _metrics._shard().cache_hits += 1
+            return result
+        self.misses += 1
+        if _metrics is not None:
+            _metrics._shard().cache_misses += 1
+        result = node._render()
+        self._entries[node] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def __enter__(self):
+        _render_state.previous.append(_render_state.cache)
+        _render_state.cache = self
+        return self
+
+    def __exit__(self, *exc_info):
+        _render_state.cache = _render_state.previous.pop()
+
+
+class _RenderState(threading.local):
+    # This, the metrics registry and the count of custom renders are the only mutable
+    # module-level state; everything else at module level is a read-only table, so parsing
+    # and rendering are safe without the GIL.
+    def __init__(self):
+        self.cache = None
+        self.previous = []
+        # the `_RenderOptions` of the `render` call in progress, if any
+        self.options = None
+
+_render_state = _RenderState()
+
+
+class _MetricsShard:
+    def __init__(self, histogram_size):
+        self.symbols = 0
+        self.failures = {}
+        self.latencies = [[0] * histogram_size for _ in range(len(Metrics.LENGTH_BOUNDS) + 1)]
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Metrics:
+    """
+    A registry of parser metrics, collected while it is enabled with `enable_metrics`:
+        * the number of symbols parsed;
+        * the number of failures by reason, `"unparsed"` for symbols that parse to `None`
+          and `"not_implemented:<production>"` for symbols that raise `NotImplementedError`,
+          where the production is the parsing function that raised it, e.g. `expression`;
+        * a histogram of parsing latency for each bucket of symbol lengths;
+        * the hits and misses of every active `RenderCache`.
+
+    Each thread updates its own set of counters, so recording takes no locks. `snapshot`
+    sums them up, and `reset` zeroes them; an update that races with `reset` may be kept.
+    """
+
+    # upper bounds of symbol length buckets; the last bucket is unbounded
+    LENGTH_BOUNDS = (32, 64, 128, 256, 512, 1024)
+    # upper bounds of latency buckets, in seconds; the last bucket is unbounded
+    LATENCY_BOUNDS = (5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 5e-3, 1e-2)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _MetricsShard(len(self.LATENCY_BOUNDS) + 1)
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def record(self, symbol_length, latency, failure=None):
+        shard = self._shard()
+        shard.symbols += 1
+        if failure is not None:
+            shard.failures[failure] = shard.failures.get(failure, 0) + 1
+        shard.latencies[bisect_left(self.LENGTH_BOUNDS, symbol_length)] \
+            [bisect_left(self.LATENCY_BOUNDS, latency)] += 1
+
+    def snapshot(self):
+        """
+        Return the current metrics as a `dict` of plain values:
+            * `symbols` (`int`)
+            * `failures` (`dict`) maps reasons to counts
+            * `latency` (`list`) holds a `dict` for each length bucket, with
+              `max_length` (`int`, or `None` for the last bucket) and `counts` (`list`),
+              holding the number of symbols for each bucket of `LATENCY_BOUNDS` and
+              one more for longer latencies
+            * `cache_hits`, `cache_misses` (`int`) and `cache_hit_rate` (`float`)
+        """
+        with self._lock:
+            shards = list(self._shards)
+        symbols = cache_hits = cache_misses = 0
+        failures = {}
+        latencies = [[0] * (len(self.LATENCY_BOUNDS) + 1)
+                     for _ in range(len(self.LENGTH_BOUNDS) + 1)]
+        for shard in shards:
+            symbols += shard.symbols
+            cache_hits += shard.cache_hits
+            cache_misses += shard.cache_misses
+            for reason, count in list(shard.failures.items()):
+                failures[reason] = failures.get(reason, 0) + count
+            for total, counts in zip(latencies, shard.latencies):
+                for index, count in enumerate(counts):
+                    total[index] += count
+        lookups = cache_hits + cache_misses
+        return {
+            'symbols': symbols,
+            'failures': failures,
+            'latency': [{'max_length': max_length, 'counts': counts}
+                        for max_length, counts in zip(self.LENGTH_BOUNDS + (None,), latencies)],
+            'cache_hits': cache_hits,
+            'cache_misses': cache_misses,
+            'cache_hit_rate': cache_hits / float(lookups) if lookups else 0.0,
+        }
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.__init__(len(self.LATENCY_BOUNDS) + 1)
+
+
+_metrics = None
+
+
+def enable_metrics(metrics=None):
+    """
+    Start recording parser metrics into `metrics`, or a new `Metrics` registry, and return
+    the registry.
+    """
+    global _metrics
+    if metrics is None:
+        metrics = Metrics()
+    _metrics = metrics
+    return metrics
+
+def disable_metrics():
+    """
+    Stop recording parser metrics, and return the registry they were recorded into, if any.
+    """
+    global _metrics
+    metrics, _metrics = _metrics, None
+    return metrics
+
+
+class _RenderOptions:
+    def __init__(self, max_length, max_template_depth, style):
+        # characters left before rendering stops; only names are counted, which is enough
+        # because they are rendered in output order
+        self.budget = max_length
+        self.truncated = False
+        self.max_template_depth = max_template_depth
+        self.template_depth = 0
+        self.style = style
+
+
+def _render_with_options(node, options):
+    if options.budget is not None and options.budget <= 0:
+        options.truncated = True
+        return ''
+    render = node._render if options.style is None else _STYLES[options.style]
+    if node.kind == 'tpl_args' and options.max_template_depth is not None:
+        if options.template_depth >= options.max_template_depth:
+            return '<...>'
+        options.template_depth += 1
+        try:
+            return render(node) if options.style else render()
+        finally:
+            options.template_depth -= 1
+    result = render(node) if options.style else render()
+    if options.budget is not None and node.kind in ('name', 'builtin'):
+        options.budget -= len(result)
+    return result
+
+
+# the number of `render` calls with options in progress in all threads; while it is zero,
+# `str()` does not need to look up the thread-local options
+_custom_renders = 0
+_custom_renders_lock = threading.Lock()
+
+
+def _style():
+    if _custom_renders:
+        options = _render_state.options
+        if options is not None:
+            return options.style
+    return None
+
+
+class _Renderable:
+    def __str__(self):
+        if _custom_renders:
+            options = _render_state.options
+            if options is not None:
+                return _render_with_options(self, options)
+        if self.kind != 'tpl_args':
+            return self._render()
+        cache = _render_state.cache
+        if cache is None:
+            return self._render()
+        return cache.render(self)
+
+
+class Node(_Renderable, namedtuple('Node', 'kind value')):
     def __repr__(self):
         return "<Node {} {}>".format(self.kind, repr(self.value))
 
-    def __str__(self):
-        if self.kind in ('name', 'builtin'):
+    def _render(self):
+        if self.kind == 'builtin':
             return self.value
+        elif self.kind == 'name':
+            # `str` unless parsed with `spans`
+            return str(self.value)
         elif self.kind == 'qual_name':
             result = ''
             for node in self.value:
@@ -143,6 +498,22 @@ class Node(namedtuple('Node', 'kind value')):
             return self.value.left() + '&&' + self.value.right()
         elif self.kind == 'tpl_param':
             return '{T' + str(self.value) + '}'
+        elif self.kind == 'unnamed_type':
+            return '{unnamed type#' + str(self.value) + '}'
+        elif self.kind == 'string_literal':
+            return 'string literal'
+        elif self.kind == 'tpl_arg_pack':
+            return ', '.join(map(str, self.value))
+        elif self.kind == 'expand_arg_pack':
+            if self.value.kind == 'tpl_arg_pack':
+                return str(self.value)
+            return str(self.value) + '...'
+        elif self.kind == 'func_param':
+            return '{parm#' + str(self.value) + '}'
+        elif self.kind == 'decltype':
+            return 'decltype (' + str(self.value) + ')'
+        elif self.kind == 'dtor_name':
+            return '~' + str(self.value)
         elif self.kind == 'subst':
             return '{S' + str(self.value) + '}'
         elif self.kind == 'vtable':
@@ -161,6 +532,8 @@ class Node(namedtuple('Node', 'kind value')):
             return 'guard variable for ' + str(self.value)
         elif self.kind == 'transaction_clone':
             return 'transaction clone for ' + str(self.value)
+        elif self.kind == 'covariant_thunk':
+            return 'covariant return thunk for ' + str(self.value)
         else:
             return repr(self)
 
@@ -182,7 +555,8 @@ class Node(namedtuple('Node', 'kind value')):
 
     def map(self, f):
         if self.kind in ('oper_cast', 'pointer', 'lvalue', 'rvalue', 'expand_arg_pack',
-                         'vtable', 'vtt', 'typeinfo', 'typeinfo_name'):
+                         'vtable', 'vtt', 'typeinfo', 'typeinfo_name', 'decltype',
+                         'dtor_name'):
             return self._replace(value=f(self.value))
         elif self.kind in ('qual_name', 'tpl_args', 'tpl_arg_pack'):
             return self._replace(value=tuple(map(f, self.value)))
@@ -190,11 +564,11 @@ class Node(namedtuple('Node', 'kind value')):
             return self
 
 
-class QualNode(namedtuple('QualNode', 'kind value qual')):
+class QualNode(_Renderable, namedtuple('QualNode', 'kind value qual')):
     def __repr__(self):
         return "<QualNode {} {} {}>".format(self.kind, repr(self.qual), repr(self.value))
 
-    def __str__(self):
+    def _render(self):
         if self.kind == 'abi':
             return str(self.value) + "".join(['[abi:' + tag + ']' for tag in self.qual])
         elif self.kind == 'cv_qual':
@@ -203,9 +577,19 @@ class QualNode(namedtuple('QualNode', 'kind value qual')):
             return repr(self)
 
     def left(self):
+        if self.kind == 'cv_qual' and _style() == 'cxxfilt':
+            if self.value.kind == 'func':
+                return self.value.left()
+            elif self.value.kind in ('pointer', 'lvalue', 'rvalue'):
+                return self.value.left() + ' ' + _cv_text(self.qual)
         return str(self)
 
     def right(self):
+        if self.kind == 'cv_qual' and _style() == 'cxxfilt':
+            if self.value.kind == 'func':
+                return self.value.right() + ' ' + _cv_text(self.qual)
+            elif self.value.kind in ('pointer', 'lvalue', 'rvalue'):
+                return self.value.right()
         return ""
 
     def map(self, f):
@@ -215,11 +599,11 @@ class QualNode(namedtuple('QualNode', 'kind value qual')):
             return self
 
 
-class CastNode(namedtuple('CastNode', 'kind value ty')):
+class CastNode(_Renderable, namedtuple('CastNode', 'kind value ty')):
     def __repr__(self):
         return "<CastNode {} {} {}>".format(self.kind, repr(self.ty), repr(self.value))
 
-    def __str__(self):
+    def _render(self):
         if self.kind == 'literal':
             return '(' + str(self.ty) + ')' + str(self.value)
         else:
@@ -238,12 +622,12 @@ class CastNode(namedtuple('CastNode', 'kind value ty')):
             return self
 
 
-class FuncNode(namedtuple('FuncNode', 'kind name arg_tys ret_ty')):
+class FuncNode(_Renderable, namedtuple('FuncNode', 'kind name arg_tys ret_ty')):
     def __repr__(self):
         return "<FuncNode {} {} {} {}>".format(self.kind, repr(self.name),
                                                repr(self.arg_tys), repr(self.ret_ty))
 
-    def __str__(self):
+    def _render(self):
         if self.kind == 'func':
             result = ""
             if self.ret_ty is not None:
@@ -290,21 +674,28 @@ class FuncNode(namedtuple('FuncNode', 'kind name arg_tys ret_ty')):
             return self
 
 
-class ArrayNode(namedtuple('ArrayNode', 'kind dimension ty')):
+def _dimension(dimension):
+    # `None` for arrays of unknown bound
+    return '' if dimension is None else str(dimension)
+
+
+class ArrayNode(_Renderable, namedtuple('ArrayNode', 'kind dimension ty')):
     def __repr__(self):
         return "<ArrayNode {} {} {}>".format(self.kind, repr(self.dimension), repr(self.ty))
 
-    def __str__(self):
+    def _render(self):
         if self.kind == 'array':
             result = ""
             result += str(self.ty)
-            result += "[" + str(self.dimension) + "]"
+            result += "[" + _dimension(self.dimension) + "]"
             return result
         else:
             return repr(self)
 
     def left(self):
         if self.kind == 'array':
+            if _style() == 'cxxfilt':
+                return str(self.ty) + " ("
             result = str(self.ty) + "("
             return result
         else:
@@ -312,7 +703,9 @@ class ArrayNode(namedtuple('ArrayNode', 'kind dimension ty')):
 
     def right(self):
         if self.kind == 'array':
-            result = ")[" + str(self.dimension) + "]"
+            if _style() == 'cxxfilt':
+                return ") [" + _dimension(self.dimension) + "]"
+            result = ")[" + _dimension(self.dimension) + "]"
             return result
         else:
             return ""
@@ -325,11 +718,11 @@ class ArrayNode(namedtuple('ArrayNode', 'kind dimension ty')):
             return self
 
 
-class MemberNode(namedtuple('MemberNode', 'kind cls_ty member_ty')):
+class MemberNode(_Renderable, namedtuple('MemberNode', 'kind cls_ty member_ty')):
     def __repr__(self):
         return "<MemberNode {} {} {}>".format(self.kind, repr(self.cls_ty), repr(self.member_ty))
 
-    def __str__(self):
+    def _render(self):
         if self.kind == 'data':
             result = str(self.member_ty) + " " + str(self.cls_ty) + "::*"
             return result
@@ -359,6 +752,310 @@ class MemberNode(namedtuple('MemberNode', 'kind cls_ty member_ty')):
             return self
 
 
+class LocalNode(_Renderable, namedtuple('LocalNode', 'kind func entity disc')):
+    def __repr__(self):
+        return "<LocalNode {} {} {} {}>".format(self.kind, repr(self.func), repr(self.entity),
+                                                repr(self.disc))
+
+    def _render(self):
+        if self.kind == 'local_name':
+            func = self.func
+            if func.kind == 'func':
+                func = func._replace(ret_ty=None)
+            return str(func) + '::' + str(self.entity)
+        else:
+            return repr(self)
+
+    def left(self):
+        return str(self)
+
+    def right(self):
+        return ""
+
+    def map(self, f):
+        if self.kind == 'local_name':
+            return self._replace(func=f(self.func), entity=f(self.entity))
+        else:
+            return self
+
+
+class ClosureNode(_Renderable, namedtuple('ClosureNode', 'kind arg_tys index')):
+    def __repr__(self):
+        return "<ClosureNode {} {} {}>".format(self.kind, repr(self.arg_tys), repr(self.index))
+
+    def _render(self):
+        if self.kind == 'closure':
+            if self.arg_tys == (Node('builtin', 'void'),):
+                args = ''
+            else:
+                args = ', '.join(map(str, self.arg_tys))
+            return '{lambda(' + args + ')#' + str(self.index) + '}'
+        else:
+            return repr(self)
+
+    def left(self):
+        return str(self)
+
+    def right(self):
+        return ""
+
+    def map(self, f):
+        if self.kind == 'closure':
+            return self._replace(arg_tys=tuple(map(f, self.arg_tys)))
+        else:
+            return self
+
+
+class TempNode(_Renderable, namedtuple('TempNode', 'kind value index')):
+    def __repr__(self):
+        return "<TempNode {} {} {}>".format(self.kind, repr(self.value), repr(self.index))
+
+    def _render(self):
+        if self.kind == 'extended_temporary':
+            return 'reference temporary #' + str(self.index) + ' for ' + str(self.value)
+        else:
+            return repr(self)
+
+    def left(self):
+        return str(self)
+
+    def right(self):
+        return ""
+
+    def map(self, f):
+        if self.kind == 'extended_temporary':
+            return self._replace(value=f(self.value))
+        else:
+            return self
+
+
+def _subexpr(node):
+    if node.kind in ('name', 'func_param') or \
+            (node.kind == 'qual_name' and node.value[-1].kind != 'tpl_args'):
+        return str(node)
+    return '(' + str(node) + ')'
+
+class ExprNode(_Renderable, namedtuple('ExprNode', 'kind op operands')):
+    def __repr__(self):
+        return "<ExprNode {} {} {}>".format(self.kind, repr(self.op), repr(self.operands))
+
+    def _render(self):
+        operands = self.operands
+        if self.kind == 'unary':
+            return self.op + _subexpr(operands[0])
+        elif self.kind == 'postfix':
+            return _subexpr(operands[0]) + self.op
+        elif self.kind == 'binary':
+            if self.op == '[]':
+                return _subexpr(operands[0]) + '[' + str(operands[1]) + ']'
+            return _subexpr(operands[0]) + self.op + _subexpr(operands[1])
+        elif self.kind == 'ternary':
+            return ' '.join([_subexpr(operands[0]), '?', _subexpr(operands[1]), ':',
+                             _subexpr(operands[2])])
+        elif self.kind == 'member':
+            return _subexpr(operands[0]) + self.op + str(operands[1])
+        elif self.kind == 'call':
+            return _subexpr(operands[0]) + '(' + ', '.join(map(str, operands[1:])) + ')'
+        elif self.kind == 'cast':
+            return self.op + '<' + str(operands[0]) + '>(' + str(operands[1]) + ')'
+        elif self.kind == 'conversion':
+            if len(operands) == 2:
+                return '(' + str(operands[0]) + ')' + _subexpr(operands[1])
+            return str(operands[0]) + '(' + ', '.join(map(str, operands[1:])) + ')'
+        elif self.kind == 'keyword':
+            if not operands:
+                return self.op
+            return self.op + ' (' + str(operands[0]) + ')'
+        elif self.kind == 'sizeof_pack':
+            if operands[0].kind == 'tpl_arg_pack':
+                return str(len(operands[0].value))
+            return 'sizeof...(' + str(operands[0]) + ')'
+        elif self.kind == 'pack_expansion':
+            return _subexpr(operands[0]) + '...'
+        elif self.kind == 'new':
+            result = self.op + ' '
+            if operands[0].operands:
+                result += '(' + str(operands[0]) + ') '
+            return result + ''.join(map(str, operands[1:]))
+        elif self.kind == 'expr_list':
+            result = ', '.join(map(str, operands))
+            if self.op is None:
+                return result
+            return self.op[0] + result + self.op[1]
+        else:
+            return repr(self)
+
+    def left(self):
+        return str(self)
+
+    def right(self):
+        return ""
+
+    def map(self, f):
+        return self._replace(operands=tuple(map(f, self.operands)))
+
+
+# ================================================================================================
+# The `c++filt` rendering style. Nodes whose rendering differs are rendered by `_render_cxxfilt`
+# instead of `_render`; `left` and `right` check the style themselves.
+
+_cxxfilt_std_names = {
+    Node('name', 'string'): (
+        Node('name', 'basic_string'),
+        Node('tpl_args', (
+            Node('builtin', 'char'),
+            Node('qual_name', (Node('name', 'std'), Node('name', 'char_traits'),
+                               Node('tpl_args', (Node('builtin', 'char'),)))),
+            Node('qual_name', (Node('name', 'std'), Node('name', 'allocator'),
+                               Node('tpl_args', (Node('builtin', 'char'),))))))),
+}
+for _name in ('istream', 'ostream', 'iostream'):
+    _cxxfilt_std_names[Node('name', _name)] = (
+        Node('name', 'basic_' + _name),
+        Node('tpl_args', (
+            Node('builtin', 'char'),
+            Node('qual_name', (Node('name', 'std'), Node('name', 'char_traits'),
+                               Node('tpl_args', (Node('builtin', 'char'),)))))))
+
+_cxxfilt_prefixes = {
+    'vtt': 'VTT for ',
+    'nonvirt_thunk': 'non-virtual thunk to ',
+    'virt_thunk': 'virtual thunk to ',
+    'covariant_thunk': 'covariant return thunk to ',
+}
+
+_cxxfilt_literal_suffixes = {
+    'int': '',
+    'unsigned int': 'u',
+    'long': 'l',
+    'unsigned long': 'ul',
+    'long long': 'll',
+    'unsigned long long': 'ull',
+}
+
+_cxxfilt_builtins = {
+    '__float80': 'long double',
+    '_Decimal32': 'decimal32',
+    '_Decimal64': 'decimal64',
+    '_Decimal128': 'decimal128',
+}
+
+_cv_order = ('const', 'volatile', 'restrict')
+
+
+def _cv_text(qual):
+    return ' '.join(name for name in _cv_order if name in qual)
+
+
+def _cxxfilt_qual_name(parts):
+    if parts[0] == Node('name', 'std') and len(parts) > 1:
+        if parts[1] in _cxxfilt_std_names:
+            parts = parts[:1] + _cxxfilt_std_names[parts[1]] + parts[2:]
+        elif parts[1] == Node('builtin', 'nullptr_t'):
+            return 'decltype(nullptr)'
+    result = ''
+    class_name = ''
+    for node in parts:
+        if node.kind == 'tpl_args':
+            if result.endswith('<'):
+                # e.g. `operator<< <char>`
+                result += ' '
+            result += str(node)
+            continue
+        if result != '':
+            result += '::'
+        if node.kind == 'ctor':
+            text = class_name
+        elif node.kind == 'dtor':
+            text = '~' + class_name
+        else:
+            text = str(node)
+        if node.kind == 'abi':
+            # not `str(node.value)`, which would be charged to the length budget again
+            class_name = text.split('[abi:')[0]
+        else:
+            class_name = text
+        result += text
+    return result
+
+
+def _cxxfilt_literal(node):
+    value = str(node.value)
+    if value.startswith('n'):
+        value = '-' + value[1:]
+    if node.ty.kind == 'builtin':
+        if node.ty.value == 'bool' and value in ('0', '1'):
+            return 'false' if value == '0' else 'true'
+        elif node.ty.value in _cxxfilt_literal_suffixes:
+            return value + _cxxfilt_literal_suffixes[node.ty.value]
+    return '(' + str(node.ty) + ')' + value
+
+
+def _cxxfilt_func(node):
+    # method qualifiers wrap the name, or the entity of a local name
+    name, qualifiers = node.name, ''
+    while True:
+        if name.kind == 'local_name' and \
+                name.entity.kind in ('cv_qual', 'lvalue', 'rvalue'):
+            entity, entity_qualifiers = name.entity, ''
+            while entity.kind in ('cv_qual', 'lvalue', 'rvalue'):
+                entity_qualifiers = _method_qualifier(entity) + entity_qualifiers
+                entity = entity.value
+            name, qualifiers = name._replace(entity=entity), entity_qualifiers + qualifiers
+        elif name.kind in ('cv_qual', 'lvalue', 'rvalue'):
+            qualifiers = _method_qualifier(name) + qualifiers
+            name = name.value
+        else:
+            break
+    result = ''
+    if node.ret_ty is not None:
+        result += str(node.ret_ty) + ' '
+    result += str(name)
+    if node.arg_tys == (Node('builtin', 'void'),):
+        result += '()'
+    else:
+        result += '(' + ', '.join(map(str, node.arg_tys)) + ')'
+    return result + qualifiers
+
+
+def _method_qualifier(node):
+    if node.kind == 'cv_qual':
+        return ' ' + _cv_text(node.qual)
+    return ' &' if node.kind == 'lvalue' else ' &&'
+
+
+def _render_cxxfilt(node):
+    kind = node.kind
+    if kind == 'tpl_args':
+        result = '<' + ', '.join(map(str, node.value))
+        return result + (' >' if result.endswith('>') else '>')
+    elif kind == 'qual_name':
+        return _cxxfilt_qual_name(node.value)
+    elif kind == 'name' and node.value.startswith('_GLOBAL__N'):
+        return '(anonymous namespace)'
+    elif kind == 'builtin' and node.value in _cxxfilt_builtins:
+        return _cxxfilt_builtins[node.value]
+    elif kind in _cxxfilt_prefixes:
+        return _cxxfilt_prefixes[kind] + str(node.value)
+    elif kind == 'literal':
+        return _cxxfilt_literal(node)
+    elif kind == 'cv_qual':
+        return str(node.value) + ' ' + _cv_text(node.qual)
+    elif kind == 'func' and node.name is not None:
+        return _cxxfilt_func(node)
+    elif kind == 'data' and node.member_ty.kind == 'cv_qual' and \
+            node.member_ty.value.kind == 'func':
+        return node.member_ty.left() + str(node.cls_ty) + '::*' + node.member_ty.right()
+    elif kind == 'array':
+        return str(node.ty) + ' [' + _dimension(node.dimension) + ']'
+    return node._render()
+
+
+_STYLES = {
+    'cxxfilt': _render_cxxfilt,
+}
+
+
 _ctor_dtor_map = {
     'C1': 'complete',
     'C2': 'base',
@@ -369,13 +1066,13 @@ _ctor_dtor_map = {
 }
 
 _std_names = {
-    'St': [Node('name', 'std')],
-    'Sa': [Node('name', 'std'), Node('name', 'allocator')],
-    'Sb': [Node('name', 'std'), Node('name', 'basic_string')],
-    'Ss': [Node('name', 'std'), Node('name', 'string')],
-    'Si': [Node('name', 'std'), Node('name', 'istream')],
-    'So': [Node('name', 'std'), Node('name', 'ostream')],
-    'Sd': [Node('name', 'std'), Node('name', 'iostream')],
+    'St': (Node('name', 'std'),),
+    'Sa': (Node('name', 'std'), Node('name', 'allocator')),
+    'Sb': (Node('name', 'std'), Node('name', 'basic_string')),
+    'Ss': (Node('name', 'std'), Node('name', 'string')),
+    'Si': (Node('name', 'std'), Node('name', 'istream')),
+    'So': (Node('name', 'std'), Node('name', 'ostream')),
+    'Sd': (Node('name', 'std'), Node('name', 'iostream')),
 }
 
 _operators = {
@@ -457,6 +1154,7 @@ _builtin_types = {
     'Di': Node('builtin', 'char32_t'),
     'Ds': Node('builtin', 'char16_t'),
     'Da': Node('builtin', 'auto'),
+    'Dc': Node('builtin', 'decltype(auto)'),
     'Dn': Node('qual_name', (Node('name', 'std'), Node('builtin', 'nullptr_t')))
 }
 
@@ -500,6 +1198,18 @@ def _parse_seq_id(cursor):
     else:
         return 1 + int(seq_id, 36)
 
+def _parse_discriminator(cursor):
+    if cursor.accept('__'):
+        index = _parse_number(cursor)
+        if index is None or not cursor.accept('_'):
+            return None
+        return index
+    elif cursor.accept('_'):
+        index = cursor.advance(1)
+        if index is None or not index.isdigit():
+            return None
+        return int(index)
+
 def _parse_until_end(cursor, kind, fn):
     nodes = []
     while not cursor.accept('E'):
@@ -512,10 +1222,15 @@ def _parse_until_end(cursor, kind, fn):
 
 _SOURCE_NAME_RE = re.compile(r"\d+")
 
-def _parse_source_name(cursor):
+def _parse_source_name(cursor, as_span=False):
     match = cursor.match(_SOURCE_NAME_RE)
+    if match is None:
+        return None
     name_len = int(match.group(0))
-    name = cursor.advance(name_len)
+    if as_span:
+        name = cursor.advance_span(name_len)
+    else:
+        name = cursor.advance(name_len)
     if name is None:
         return None
     return name
@@ -546,7 +1261,7 @@ def _parse_name(cursor, is_nested=False):
     if match is None:
         return None
     elif match.group('source_name') is not None:
-        name = _parse_source_name(cursor)
+        name = _parse_source_name(cursor, cursor.spans)
         if name is None:
             return None
         node = Node('name', name)
@@ -581,6 +1296,9 @@ def _parse_name(cursor, is_nested=False):
     elif match.group('nested_name') is not None:
         nodes = []
         while True:
+            # substitutions (other than `St`) and template parameters are not added again
+            # as prefixes
+            is_subst = (cursor.peek('S') and not cursor.peek('St')) or cursor.peek('T')
             name = _parse_name(cursor, is_nested=True)
             if name is None or cursor.at_end():
                 return None
@@ -590,16 +1308,17 @@ def _parse_name(cursor, is_nested=False):
                 nodes.append(name)
             if cursor.accept('E'):
                 break
-            else:
+            elif not is_subst:
                 cursor.add_subst(Node('qual_name', tuple(nodes)))
         node = Node('qual_name', tuple(nodes))
         node = _handle_cv(match.group('cv_qual'), node)
         node = _handle_indirect(match.group('ref_qual'), node)
     elif match.group('template_param') is not None:
-        seq_id = _parse_seq_id(cursor)
-        if seq_id is None:
+        # unlike seq-ids, template parameter indexes are decimal
+        index = _parse_number(cursor)
+        if not cursor.accept('_'):
             return None
-        node = Node('tpl_param', seq_id)
+        node = Node('tpl_param', 0 if index is None else index + 1)
         cursor.add_subst(node)
     elif match.group('template_args') is not None:
         node = _parse_until_end(cursor, 'tpl_args', _parse_type)
@@ -607,17 +1326,39 @@ def _parse_name(cursor, is_nested=False):
         # not in the ABI doc, but probably means `const`
         return _parse_name(cursor, is_nested)
     elif match.group('local_name') is not None:
-        raise NotImplementedError("local names are not supported")
+        func = _parse_encoding(cursor, is_local=True)
+        if func is None or not cursor.accept('E'):
+            return None
+        if cursor.accept('s'):
+            entity = Node('string_literal', None)
+        else:
+            entity = _parse_name(cursor)
+            if entity is None:
+                return None
+        disc = _parse_discriminator(cursor)
+        node = LocalNode('local_name', func, entity, disc)
     elif match.group('unnamed_type') is not None:
-        raise NotImplementedError("unnamed types are not supported")
+        index = _parse_number(cursor)
+        if not cursor.accept('_'):
+            return None
+        node = Node('unnamed_type', 1 if index is None else index + 2)
     elif match.group('closure_type') is not None:
-        raise NotImplementedError("closure (lambda) types are not supported")
+        arg_tys = _parse_until_end(cursor, 'arg_tys', _parse_type)
+        if arg_tys is None:
+            return None
+        index = _parse_number(cursor)
+        if not cursor.accept('_'):
+            return None
+        node = ClosureNode('closure', arg_tys.value, 1 if index is None else index + 2)
     if node is None:
         return None
 
     abi_tags = []
     while cursor.accept('B'):
-        abi_tags.append(_parse_source_name(cursor))
+        abi_tag = _parse_source_name(cursor)
+        if abi_tag is None:
+            return None
+        abi_tags.append(abi_tag)
     if abi_tags:
         node = QualNode('abi', node, frozenset(abi_tags))
 
@@ -631,18 +1372,15 @@ def _parse_name(cursor, is_nested=False):
         templ_args = _parse_until_end(cursor, 'tpl_args', _parse_type)
         if templ_args is None:
             return None
+        # the template-id itself is a candidate only where it is a type, see `_parse_type`
         node = Node('qual_name', (node, templ_args))
-        if ((match.group('std_prefix') is not None or
-                match.group('std_name') is not None) and
-                node.value[0].value[1].kind not in ('oper', 'oper_cast')):
-            cursor.add_subst(node)
 
     return node
 
 
 _TYPE_RE = re.compile(r"""
 (?P<builtin_type>       v|w|b|c|a|h|s|t|i|j|l|m|x|y|n|o|f|d|e|g|z|
-                        Dd|De|Df|Dh|DF|Di|Ds|Da|Dc|Dn) |
+                        Dd|De|Df|Dh|Di|Ds|Da|Dc|Dn) |
 (?P<qualified_type>     [rVK]+) |
 (?P<indirect_type>      [PRO]) |
 (?P<function_type>      F) |
@@ -658,8 +1396,13 @@ _TYPE_RE = re.compile(r"""
 def _parse_type(cursor):
     match = cursor.match(_TYPE_RE)
     if match is None:
+        start = cursor._pos
         node = _parse_name(cursor)
-        cursor.add_subst(node)
+        if node is None:
+            return None
+        # `std::` abbreviations are substitutions already, and are not candidates again
+        if cursor._raw[start:cursor._pos] not in _std_names:
+            cursor.add_subst(node)
     elif match.group('builtin_type') is not None:
         node = _builtin_types[match.group('builtin_type')]
     elif match.group('qualified_type') is not None:
@@ -687,35 +1430,53 @@ def _parse_type(cursor):
         node = FuncNode('func', None, tuple(arg_tys), ret_ty)
         cursor.add_subst(node)
     elif match.group('expression') is not None:
-        raise NotImplementedError("expressions are not supported")
+        node = _parse_expression(cursor)
+        if node is None or not cursor.accept('E'):
+            return None
     elif match.group('expr_primary') is not None:
         node = _parse_expr_primary(cursor)
     elif match.group('template_arg_pack') is not None:
         node = _parse_until_end(cursor, 'tpl_arg_pack', _parse_type)
     elif match.group('arg_pack_expansion') is not None:
         node = _parse_type(cursor)
+        if node is None:
+            return None
         node = Node('expand_arg_pack', node)
     elif match.group('decltype') is not None:
-        raise NotImplementedError("decltype is not supported")
-    elif match.group('array_type') is not None:
-        dimension = _parse_number(cursor)
-        if dimension is None:
+        expr = _parse_expression(cursor)
+        if expr is None or not cursor.accept('E'):
             return None
-        else:
+        node = Node('decltype', expr)
+        cursor.add_subst(node)
+    elif match.group('array_type') is not None:
+        dimension = None if cursor.peek('_') else _parse_number(cursor)
+        if dimension is not None:
             dimension = CastNode('literal', dimension, Node('builtin', 'int'))
+        elif not cursor.peek('_'):
+            # an instantiation-dependent dimension
+            dimension = _parse_expression(cursor)
+            if dimension is None:
+                return None
         if not cursor.accept('_'):
             return None
         type = _parse_type(cursor)
+        if type is None:
+            return None
         node = ArrayNode('array', dimension, type)
         cursor.add_subst(node)
     elif match.group('member_type') is not None:
         cls_ty = _parse_type(cursor)
+        if cls_ty is None:
+            return None
         member_ty = _parse_type(cursor)
+        if member_ty is None:
+            return None
         if member_ty.kind == 'func':
             kind = "method"
         else:
             kind = "data"
         node = MemberNode(kind, cls_ty, member_ty)
+        cursor.add_subst(node)
     else:
         return None
     return node
@@ -743,28 +1504,321 @@ def _parse_expr_primary(cursor):
         return CastNode('literal', value, ty)
 
 
+_UNRESOLVED_NAME_RE = re.compile(r"""
+(?P<global_scope>       gs) |
+(?P<qualified_type>     srN) |
+(?P<qualified_levels>   sr (?= \d)) |
+(?P<qualified_simple>   sr)
+""", re.X)
+
+_BASE_UNRESOLVED_NAME_RE = re.compile(r"""
+(?P<simple_id>          (?= \d)) |
+(?P<operator_name>      on) |
+(?P<destructor_name>    dn)
+""", re.X)
+
+def _parse_simple_id(cursor):
+    name = _parse_source_name(cursor)
+    if name is None:
+        return None
+    node = Node('name', name)
+    if cursor.accept('I'):
+        tpl_args = _parse_until_end(cursor, 'tpl_args', _parse_type)
+        if tpl_args is None:
+            return None
+        return Node('qual_name', (node, tpl_args))
+    return node
+
+def _parse_unresolved_type(cursor):
+    node = _parse_type(cursor)
+    if node is not None and node.kind == 'tpl_param' and cursor.accept('I'):
+        tpl_args = _parse_until_end(cursor, 'tpl_args', _parse_type)
+        if tpl_args is None:
+            return None
+        node = Node('qual_name', (node, tpl_args))
+        cursor.add_subst(node)
+    return node
+
+def _parse_base_unresolved_name(cursor):
+    match = cursor.match(_BASE_UNRESOLVED_NAME_RE)
+    if match is None:
+        return None
+    elif match.group('simple_id') is not None:
+        return _parse_simple_id(cursor)
+    elif match.group('operator_name') is not None:
+        return _parse_name(cursor)
+    elif match.group('destructor_name') is not None:
+        if cursor.peek('T') or cursor.peek('D') or cursor.peek('S'):
+            name = _parse_unresolved_type(cursor)
+        else:
+            name = _parse_simple_id(cursor)
+        if name is None:
+            return None
+        return Node('dtor_name', name)
+
+def _parse_unresolved_name(cursor):
+    match = cursor.match(_UNRESOLVED_NAME_RE)
+    if match is not None and match.group('global_scope') is not None:
+        # the global scope qualifier is not preserved
+        match = cursor.match(_UNRESOLVED_NAME_RE)
+
+    nodes = []
+    if match is None:
+        pass
+    elif match.group('qualified_type') is not None or \
+            match.group('qualified_levels') is not None:
+        if match.group('qualified_type') is not None:
+            nodes.append(_parse_unresolved_type(cursor))
+        while not cursor.accept('E'):
+            nodes.append(_parse_simple_id(cursor))
+            if nodes[-1] is None or cursor.at_end():
+                return None
+    elif match.group('qualified_simple') is not None:
+        nodes.append(_parse_unresolved_type(cursor))
+    if None in nodes:
+        return None
+
+    base = _parse_base_unresolved_name(cursor)
+    if base is None:
+        return None
+    if not nodes:
+        return base
+    nodes.append(base)
+
+    parts = []
+    for node in nodes:
+        if node.kind == 'qual_name':
+            parts += node.value
+        else:
+            parts.append(node)
+    return Node('qual_name', tuple(parts))
+
+
+_unary_operators = ('ps', 'ng', 'ad', 'de', 'co', 'nt', 'dl', 'da')
+
+_EXPR_RE = re.compile(r"""
+(?P<template_param>     (?= T)) |
+(?P<function_param>     fp [rVK]* (?P<fp_index> \d*) _) |
+(?P<expr_primary>       (?= L)) |
+(?P<prefix_operator>    (?P<prefix_op> pp|mm) _) |
+(?P<call>               cl) |
+(?P<conversion>         cv) |
+(?P<named_cast>         dc|sc|cc|rc) |
+(?P<keyword_type>       st|at|ti) |
+(?P<keyword_expr>       sz|az|te|nx|tw) |
+(?P<rethrow>            tr) |
+(?P<sizeof_pack>        sZ) |
+(?P<pack_expansion>     sp) |
+(?P<member_access>      dt|pt) |
+(?P<new_expression>     (?:gs)?n[wa]) |
+(?P<operator>           ps|ng|ad|de|co|nt|(?:gs)?d[la]|pl|mi|ml|dv|rm|an|or|eo|aS|pL|mI|mL|
+                        dV|rM|aN|oR|eO|ls|rs|lS|rS|eq|ne|lt|gt|le|ge|aa|oo|pp|mm|cm|pm|ix|qu) |
+(?P<unresolved_name>    (?= gs|sr|on|dn|\d))
+""", re.X)
+
+_named_casts = {
+    'dc': 'dynamic_cast',
+    'sc': 'static_cast',
+    'cc': 'const_cast',
+    'rc': 'reinterpret_cast',
+}
+
+_keywords = {
+    'st': 'sizeof',
+    'sz': 'sizeof',
+    'at': 'alignof',
+    'az': 'alignof',
+    'ti': 'typeid',
+    'te': 'typeid',
+    'nx': 'noexcept',
+    'tw': 'throw',
+}
+
+def _parse_expression(cursor):
+    match = cursor.match(_EXPR_RE)
+    if match is None:
+        return None
+    elif match.group('template_param') is not None:
+        return _parse_type(cursor)
+    elif match.group('function_param') is not None:
+        index = match.group('fp_index')
+        return Node('func_param', 1 if index == '' else int(index) + 2)
+    elif match.group('expr_primary') is not None:
+        return _parse_expr_primary(cursor)
+    elif match.group('prefix_operator') is not None:
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('unary', _operators[match.group('prefix_op')], (operand,))
+    elif match.group('call') is not None:
+        operands = _parse_until_end(cursor, 'call', _parse_expression)
+        if operands is None or not operands.value:
+            return None
+        return ExprNode('call', None, operands.value)
+    elif match.group('conversion') is not None:
+        ty = _parse_type(cursor)
+        if ty is None:
+            return None
+        if cursor.accept('_'):
+            operands = _parse_until_end(cursor, 'conversion', _parse_expression)
+            if operands is None:
+                return None
+            return ExprNode('conversion', None, (ty,) + operands.value)
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('conversion', None, (ty, operand))
+    elif match.group('named_cast') is not None:
+        ty = _parse_type(cursor)
+        if ty is None:
+            return None
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('cast', _named_casts[match.group('named_cast')], (ty, operand))
+    elif match.group('keyword_type') is not None or match.group('keyword_expr') is not None:
+        if match.group('keyword_type') is not None:
+            operand = _parse_type(cursor)
+        else:
+            operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('keyword', _keywords[match.group(0)], (operand,))
+    elif match.group('rethrow') is not None:
+        return ExprNode('keyword', 'throw', ())
+    elif match.group('sizeof_pack') is not None:
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('sizeof_pack', None, (operand,))
+    elif match.group('pack_expansion') is not None:
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        return ExprNode('pack_expansion', None, (operand,))
+    elif match.group('member_access') is not None:
+        operand = _parse_expression(cursor)
+        if operand is None:
+            return None
+        member = _parse_unresolved_name(cursor)
+        if member is None:
+            return None
+        return ExprNode('member', '.' if match.group(0) == 'dt' else '->', (operand, member))
+    elif match.group('new_expression') is not None:
+        code = match.group('new_expression')
+        op = ('::' if code.startswith('gs') else '') + ('new' if code.endswith('w') else 'new[]')
+        placement = []
+        while not cursor.accept('_'):
+            operand = _parse_expression(cursor)
+            if operand is None:
+                return None
+            placement.append(operand)
+        ty = _parse_type(cursor)
+        if ty is None:
+            return None
+        operands = (ExprNode('expr_list', None, tuple(placement)), ty)
+        if cursor.accept('E'):
+            return ExprNode('new', op, operands)
+        elif cursor.accept('pi'):
+            brackets = '()'
+        elif cursor.accept('il'):
+            brackets = '{}'
+        else:
+            return None
+        initializer = _parse_until_end(cursor, 'expr_list', _parse_expression)
+        if initializer is None:
+            return None
+        return ExprNode('new', op, operands + (ExprNode('expr_list', brackets, initializer.value),))
+    elif match.group('operator') is not None:
+        code = match.group('operator')[-2:]
+        op = _operators[code]
+        if code in _unary_operators:
+            kind, arity = 'unary', 1
+            if code in ('dl', 'da'):
+                op = 'delete[] ' if code == 'da' else 'delete '
+        elif code in ('pp', 'mm'):
+            kind, arity = 'postfix', 1
+        elif code == 'qu':
+            kind, arity = 'ternary', 3
+        else:
+            kind, arity = 'binary', 2
+        operands = []
+        for _ in range(arity):
+            operand = _parse_expression(cursor)
+            if operand is None:
+                return None
+            operands.append(operand)
+        return ExprNode(kind, op, tuple(operands))
+    elif match.group('unresolved_name') is not None:
+        return _parse_unresolved_name(cursor)
+
+
+def _unwrap_name(name):
+    # strip method qualifiers and local name scopes, leaving the name of the entity itself
+    while True:
+        if name.kind in ('cv_qual', 'lvalue', 'rvalue'):
+            name = name.value
+        elif name.kind == 'local_name':
+            name = name.entity
+        else:
+            return name
+
+def _template_args(name):
+    while True:
+        unwrapped = _unwrap_name(name)
+        if unwrapped.kind == 'qual_name' and unwrapped.value[-1].kind == 'tpl_args':
+            return unwrapped.value[-1].value
+        # a local entity may refer to the template parameters of its enclosing function
+        while name.kind in ('cv_qual', 'lvalue', 'rvalue'):
+            name = name.value
+        if name.kind == 'local_name' and name.func.kind == 'func':
+            name = name.func.name
+        else:
+            return None
+
 def _expand_template_args(func):
-    if func.name.kind == 'qual_name':
-        name_suffix = func.name.value[-1]
-        if name_suffix.kind == 'tpl_args':
-            tpl_args = name_suffix.value
-            def mapper(node):
-                if node.kind == 'tpl_param' and node.value < len(tpl_args):
-                    return tpl_args[node.value]
-                return node.map(mapper)
-            return mapper(func)
+    tpl_args = _template_args(func.name)
+    if tpl_args is not None:
+        def mapper(node):
+            if node.kind == 'tpl_param' and node.value < len(tpl_args):
+                return tpl_args[node.value]
+            return _collapse_reference(node.map(mapper))
+        return mapper(func)
     return func
 
-def _parse_encoding(cursor):
+def _collapse_reference(node):
+    if node.kind in ('lvalue', 'rvalue') and node.value.kind in ('lvalue', 'rvalue'):
+        if node.kind == 'rvalue' or node.value.kind == 'lvalue':
+            return node.value
+        return node._replace(value=node.value.value)
+    return node
+
+def _expand_pattern(pattern):
+    """
+    Return a tuple with an instance of the pack expansion `pattern` for each element of the
+    argument pack in it, or `None` if there is no argument pack.
+    """
+    if pattern.kind in ('tpl_arg_pack', 'tpl_args'):
+        return pattern.value
+    elif pattern.kind in ('pointer', 'lvalue', 'rvalue', 'cv_qual'):
+        elements = _expand_pattern(pattern.value)
+        if elements is None:
+            return None
+        return tuple(_collapse_reference(pattern._replace(value=element))
+                     for element in elements)
+    return None
+
+def _parse_encoding(cursor, is_local=False):
     name = _parse_name(cursor)
     if name is None:
         return None
-    if cursor.at_end():
+    if cursor.at_end() or (is_local and cursor.peek('E')):
         return name
 
-    if name.kind == 'qual_name' \
-            and name.value[-1].kind == 'tpl_args' \
-            and name.value[-2].kind not in ('ctor', 'dtor', 'oper_cast'):
+    unwrapped = _unwrap_name(name)
+    if unwrapped.kind == 'qual_name' \
+            and unwrapped.value[-1].kind == 'tpl_args' \
+            and unwrapped.value[-2].kind not in ('ctor', 'dtor', 'oper_cast'):
         ret_ty = _parse_type(cursor)
         if ret_ty is None:
             return None
@@ -772,7 +1826,7 @@ def _parse_encoding(cursor):
         ret_ty = None
 
     arg_tys = []
-    while not cursor.at_end():
+    while not cursor.at_end() and not (is_local and cursor.peek('E')):
         arg_ty = _parse_type(cursor)
         if arg_ty is None:
             return None
@@ -795,6 +1849,11 @@ _SPECIAL_RE = re.compile(r"""
 (?P<transaction_clone>  GTt)
 """, re.X)
 
+_CALL_OFFSET_RE = re.compile(r"""
+(?P<nonvirtual_offset>  h n? \d+ _) |
+(?P<virtual_offset>     v n? \d+ _ n? \d+ _)
+""", re.X)
+
 def _parse_special(cursor):
     match = cursor.match(_SPECIAL_RE)
     if match is None:
@@ -822,14 +1881,29 @@ def _parse_special(cursor):
             return None
         return Node('virt_thunk', func)
     elif match.group('covariant_thunk') is not None:
-        raise NotImplementedError("covariant thunks are not supported")
+        if cursor.match(_CALL_OFFSET_RE) is None or cursor.match(_CALL_OFFSET_RE) is None:
+            return None
+        func = _parse_encoding(cursor)
+        if func is None:
+            return None
+        return Node('covariant_thunk', func)
     elif match.group('guard_variable'):
         name = _parse_type(cursor)
         if name is None:
             return None
         return Node('guard_variable', name)
     elif match.group('extended_temporary'):
-        raise NotImplementedError("extended temporaries are not supported")
+        name = _parse_name(cursor)
+        if name is None:
+            return None
+        if cursor.at_end():
+            # mangled by older compilers without the trailing seq-id
+            index = 0
+        else:
+            index = _parse_seq_id(cursor)
+            if index is None:
+                return None
+        return TempNode('extended_temporary', name, index)
     elif match.group('transaction_clone'):
         func = _parse_encoding(cursor)
         if func is None:
@@ -868,9 +1942,8 @@ def _expand_arg_packs(ast):
             exp_arg_tys = []
             for arg_ty in node.arg_tys:
                 if arg_ty.kind == 'expand_arg_pack' and \
-                        arg_ty.value.kind == 'rvalue' and \
-                            arg_ty.value.value.kind in ['tpl_arg_pack', 'tpl_args']:
-                    exp_arg_tys += arg_ty.value.value.value
+                        _expand_pattern(arg_ty.value) is not None:
+                    exp_arg_tys += _expand_pattern(arg_ty.value)
                 else:
                     exp_arg_tys.append(arg_ty)
             return node._replace(arg_tys=tuple(exp_arg_tys))
@@ -878,12 +1951,100 @@ def _expand_arg_packs(ast):
             return node.map(mapper)
     return mapper(ast)
 
-def parse(raw):
-    ast = _parse_mangled_name(_Cursor(raw))
+def _failed_production():
+    # `sys.exc_info`, since exceptions have no `__traceback__` on Python 2
+    traceback = sys.exc_info()[2]
+    while traceback.tb_next is not None:
+        traceback = traceback.tb_next
+    production = traceback.tb_frame.f_code.co_name
+    if production.startswith('_parse_'):
+        production = production[len('_parse_'):]
+    return production
+
+# `time.perf_counter` is not available on Python 2
+_clock = getattr(time, 'perf_counter', time.time)
+
+def _parse_measured(raw, metrics, spans):
+    start = _clock()
+    try:
+        ast = _parse_mangled_name(_Cursor(raw, spans=spans))
+        if ast is not None:
+            ast = _expand_arg_packs(ast)
+    except NotImplementedError:
+        metrics.record(len(raw), _clock() - start,
+                       'not_implemented:' + _failed_production())
+        raise
+    metrics.record(len(raw), _clock() - start,
+                   'unparsed' if ast is None else None)
+    return ast
+
+def parse(raw, spans=False):
+    """
+    Parse the mangled name `raw` into an AST, or return `None` if it is not a mangled name.
+
+    If `spans` is true, the values of `name` nodes are not `str`s but spans of `raw`, which
+    are copied only when they are rendered, formatted or hashed. They compare equal to the
+    `str`s they stand for. This is not faster, and for typical symbols it does not save
+    memory either: a span takes longer to create than a copy of a short identifier, and
+    about as much memory as a copy of 8 characters, the average identifier length in
+    libLLVM. Spans only save memory when ASTs with long identifiers are kept without being
+    rendered.
+    """
+    metrics = _metrics
+    if metrics is not None:
+        return _parse_measured(raw, metrics, spans)
+    ast = _parse_mangled_name(_Cursor(raw, spans=spans))
     if ast is not None:
         ast = _expand_arg_packs(ast)
     return ast
 
+def render(ast, max_length=None, max_template_depth=None, ellipsis='...', style=None):
+    """
+    Render `ast` like `str(ast)`, but with at most `max_length` characters, replacing the end
+    with `ellipsis` if it is longer, and with template argument lists nested deeper than
+    `max_template_depth` elided as `<...>`. Rendering stops soon after `max_length`
+    characters, so a limited rendering of a large AST is cheap. The render cache is not used.
+
+    If `style` is `"cxxfilt"`, the output is formatted like that of GNU `c++filt`, e.g.
+    `std::vector<int, std::allocator<int> >::vector()` instead of
+    `std::vector<int, std::allocator<int>>::{ctor}()`.
+    """
+    if max_length is None and max_template_depth is None and style is None:
+        return str(ast)
+    if style is not None and style not in _STYLES:
+        raise ValueError("unknown rendering style {!r}".format(style))
+    if max_length is not None and max_length < len(ellipsis):
+        raise ValueError("max_length must be at least the length of the ellipsis")
+    global _custom_renders
+    options = _RenderOptions(max_length, max_template_depth, style)
+    previous, _render_state.options = _render_state.options, options
+    with _custom_renders_lock:
+        _custom_renders += 1
+    try:
+        result = _render_with_options(ast, options)
+    finally:
+        with _custom_renders_lock:
+            _custom_renders -= 1
+        _render_state.options = previous
+    if max_length is not None and (options.truncated or len(result) > max_length):
+        result = result[:max_length - len(ellipsis)] + ellipsis
+    return result
+
+def demangle(raw, style=None):
+    """
+    Demangle `raw` into a `str` the way `c++filt` does, returning it unchanged if it cannot
+    be demangled. See `render` for `style`.
+    """
+    try:
+        ast = parse(raw)
+    except NotImplementedError:
+        ast = None
+    if ast is None:
+        return raw
+    if style is None:
+        return str(ast)
+    return render(ast, style=style)
+
 # ================================================================================================
 
 
@@ -0,0 +1,152 @@
+# encoding:utf-8
+"""
+Streaming aggregation of template instantiations.
+
+`TemplateAggregator` groups symbols by a template-erased key, where every template argument
+list in the qualified name is replaced with `<...>` and the function signature is dropped,
+so that e.g. all instantiations of `std::vector<T>::_M_realloc_insert` share the key
+`std::vector<...>::_M_realloc_insert<...>`. It keeps a count and a size sum per key.
+
+Memory is bounded by `capacity` keys using the weighted Space-Saving algorithm: when a new key
+arrives and the table is full, the key with the smallest weight is evicted and the new key
+inherits its weight. The reported weight of a key is thus an upper bound that overestimates
+the true weight by at most `error`, and any key whose true weight exceeds `total / capacity`
+is guaranteed to be present.
+"""
+
+import heapq
+from collections import namedtuple
+
+from . import parse, Node
+
+
+Entry = namedtuple('Entry', 'key count size error')
+
+_special_kinds = ('vtable', 'vtt', 'typeinfo', 'typeinfo_name', 'nonvirt_thunk', 'virt_thunk',
+                  'covariant_thunk', 'guard_variable', 'extended_temporary',
+                  'transaction_clone')
+
+_erased_args = Node('tpl_args', (Node('name', '...'),))
+
+
+def _erase(node):
+    if node is None:
+        return None
+    elif node.kind == 'tpl_args':
+        return _erased_args
+    elif node.kind == 'func' and node.name is not None:
+        return _erase(node.name)
+    elif node.kind in ('cv_qual', 'lvalue', 'rvalue') and \
+            node.value.kind in ('qual_name', 'cv_qual'):
+        # method qualifiers, e.g. `_ZNKR3foo3barEv`
+        return _erase(node.value)
+    else:
+        return node.map(_erase)
+
+def template_key(ast):
+    """
+    Return the template-erased key of a parsed symbol as a `str`.
+    """
+    if ast.kind in _special_kinds:
+        return str(ast._replace(value=_erase(ast.value)))
+    return str(_erase(ast))
+
+
+class TemplateAggregator:
+    def __init__(self, capacity=10000, by='size'):
+        if by not in ('size', 'count'):
+            raise ValueError("by must be 'size' or 'count'")
+        self.capacity = capacity
+        self.by = by
+        self.total_count = 0
+        self.total_size = 0
+        self.failed = 0
+        self._entries = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _weight(self, entry):
+        return entry[1] if self.by == 'size' else entry[0]
+
+    def add(self, symbol, size=0):
+        """
+        Parse `symbol` and account `size` to its key. Symbols that cannot be parsed are
+        only counted in `failed`.
+        """
+        try:
+            ast = parse(symbol)
+        except NotImplementedError:
+            ast = None
+        if ast is None:
+            self.failed += 1
+            return
+        self.add_key(template_key(ast), size)
+
+    def add_key(self, key, size=0):
+        self.total_count += 1
+        self.total_size += size
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += size
+            return
+
+        if len(self._entries) < self.capacity:
+            entry = [1, size, 0]
+        else:
+            victim = self._pop_min()
+            error = self._weight(victim)
+            entry = [victim[0] + 1, victim[1] + size, error]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (self._weight(entry), key))
+
+    def _pop_min(self):
+        # Heap weights are recorded at insertion and only ever lag behind, so the first
+        # entry whose recorded weight is still current is the true minimum.
+        while True:
+            weight, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            if self._weight(entry) == weight:
+                del self._entries[key]
+                return entry
+            heapq.heappush(self._heap, (self._weight(entry), key))
+
+    def feed(self, items):
+        """
+        Add every `(symbol, size)` pair from `items`.
+        """
+        for symbol, size in items:
+            self.add(symbol, size)
+
+    def top(self, k=10):
+        """
+        Return the `k` heaviest keys as a list of `Entry` tuples, heaviest first. This may be
+        called at any point during the stream.
+        """
+        entries = heapq.nlargest(k, self._entries.items(),
+                                 key=lambda item: (self._weight(item[1]), item[0]))
+        return [Entry(key, count, size, error) for key, (count, size, error) in entries]
+
+
+def _parse_nm_line(line):
+    # `nm --print-size` output, or one bare symbol per line
+    fields = line.split()
+    if len(fields) == 4:
+        return fields[3], int(fields[1], 16)
+    elif len(fields) == 1:
+        return fields[0], 0
+    return None
+
+
+if __name__ == '__main__':
+    import sys
+    aggregator = TemplateAggregator()
+    for line in sys.stdin:
+        item = _parse_nm_line(line)
+        if item is not None:
+            aggregator.add(*item)
+    for entry in aggregator.top(int(sys.argv[1]) if len(sys.argv) > 1 else 20):
+        print("{}\t{}\t{}".format(entry.size, entry.count, entry.key))
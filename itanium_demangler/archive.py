@@ -0,0 +1,187 @@
+# encoding:utf-8
+"""
+Symbols of static archives.
+
+`Archive` reads the members of a `.a` archive in the common `ar` format, with GNU or BSD
+long member names, from any buffer such as `bytes` or an `mmap`. `parse_archives` reads the
+symbol tables of the ELF object members of archives and parses the names of the symbols they
+define. Members are processed on a pool of threads, and a name that has already been seen in
+another member is skipped before it is parsed, since the same inline functions and template
+instances are defined in many objects.
+"""
+
+import mmap
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import parse
+from .elf import ElfFile, SHN_UNDEF, STT_SECTION, STT_FILE
+
+
+_symbol_tables = ('/', '/SYM64/', '__.SYMDEF', '__.SYMDEF SORTED')
+
+
+Member = namedtuple('Member', 'name offset size')
+
+
+class Archive:
+    """
+    An `ar` archive in the buffer `data`. Raises `ValueError` if `data` is not an archive.
+    """
+
+    def __init__(self, data):
+        if data[:8] == b'!<thin>\n':
+            raise NotImplementedError("thin archives are not supported")
+        if data[:8] != b'!<arch>\n':
+            raise ValueError("not an ar archive")
+        self.data = data
+        self._mmap = None
+        self._file = None
+
+        self.members = []
+        long_names = b''
+        position = 8
+        while position + 60 <= len(data):
+            header = data[position:position + 60]
+            if header[58:60] != b'`\n':
+                raise ValueError("malformed member header at offset {:#x}".format(position))
+            name = header[:16].rstrip(b' ')
+            offset = position + 60
+            size = int(header[48:58])
+            position = offset + size + (size & 1)
+
+            if name == b'//':
+                long_names = data[offset:offset + size]
+                continue
+            elif name.startswith(b'#1/'):
+                # BSD: the name precedes the contents
+                length = int(name[3:])
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                size -= length
+            elif name.startswith(b'/') and name[1:].isdigit():
+                # GNU: the name is in the long name table
+                start = int(name[1:])
+                end = long_names.find(b'\n', start)
+                name = long_names[start:end if end >= 0 else len(long_names)]
+            name = name.decode('utf-8', 'surrogateescape')
+            if name in _symbol_tables:
+                continue
+            if name.endswith('/'):
+                name = name[:-1]
+            self.members.append(Member(name, offset, size))
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-map the file at `path`. The returned `Archive` should be closed with `close`,
+        or used as a context manager.
+        """
+        file = open(path, 'rb')
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            data = b''
+        try:
+            archive = cls(data)
+        except BaseException:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            file.close()
+            raise
+        archive._file = file
+        archive._mmap = data if isinstance(data, mmap.mmap) else None
+        return archive
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def contents(self, member):
+        """
+        Return the contents of `member` as `bytes`.
+        """
+        return self.data[member.offset:member.offset + member.size]
+
+
+def defined_symbols(elf):
+    """
+    Return an iterator over the names of the symbols defined by `elf`, an `ElfFile`,
+    excluding section and file symbols.
+    """
+    for symbol in elf.symbols():
+        if symbol.name and symbol.section_index != SHN_UNDEF and \
+                symbol.type not in (STT_SECTION, STT_FILE):
+            yield symbol.name
+
+
+def _parse_member(archive, member, seen, lock):
+    try:
+        elf = ElfFile(archive.contents(member))
+    except ValueError:
+        # not an object file
+        return []
+    names = list(dict.fromkeys(defined_symbols(elf)))
+    with lock:
+        names = [name for name in names if name not in seen]
+        seen.update(names)
+    results = []
+    for name in names:
+        try:
+            ast = parse(name)
+        except NotImplementedError:
+            ast = None
+        results.append((name, ast))
+    return results
+
+
+def parse_archives(paths, workers=None, seen=None):
+    """
+    Iterate over `(name, ast)` pairs for the unique names of the symbols defined in the
+    object members of the archives at `paths`, where `ast` is `None` if the name cannot be
+    parsed. Members are processed on `workers` threads (by default, as many as
+    `ThreadPoolExecutor` picks). A name defined in several members is yielded once, with the
+    results of whichever member claimed it first.
+    """
+    if seen is None:
+        seen = set()
+    lock = threading.Lock()
+    with ThreadPoolExecutor(workers, thread_name_prefix='archive') as executor:
+        for path in paths:
+            with Archive.open(path) as archive:
+                futures = [executor.submit(_parse_member, archive, member, seen, lock)
+                           for member in archive.members]
+                try:
+                    for future in futures:
+                        yield from future.result()
+                finally:
+                    # the archive must stay mapped until no worker reads it anymore
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.archive',
+        description='Demangle the unique symbols defined in static archives.')
+    parser.add_argument('archives', nargs='+', metavar='ARCHIVE')
+    parser.add_argument('--workers', type=int, help='number of threads')
+    args = parser.parse_args()
+
+    for name, ast in parse_archives(args.archives, args.workers):
+        print(name if ast is None else ast)
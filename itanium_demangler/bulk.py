@@ -0,0 +1,136 @@
+# encoding:utf-8
+"""
+Resumable file-to-file bulk demangling.
+
+`bulk_demangle` memory-maps a newline-delimited file of symbols and writes one demangled line
+per input line, with symbols that cannot be demangled copied verbatim. The input is processed
+in chunks of roughly `chunk_size` bytes that always end on a line boundary, and the output of
+each chunk is written with a single `write` call.
+
+After every chunk, the output is flushed to disk and the input and output offsets are recorded
+in a checkpoint file, which is replaced atomically. If the job is interrupted, running it again
+truncates the output to the last checkpoint and resumes from the corresponding input offset.
+The checkpoint is removed once the job completes.
+"""
+
+import os
+import json
+import mmap
+
+from . import demangle
+
+
+DEFAULT_CHUNK_SIZE = 1 << 24
+
+
+def _chunk_end(buffer, start, chunk_size):
+    end = start + chunk_size
+    if end >= len(buffer):
+        return len(buffer)
+    newline = buffer.rfind(b'\n', start, end)
+    if newline < 0:
+        # a single line longer than the chunk
+        newline = buffer.find(b'\n', end)
+        if newline < 0:
+            return len(buffer)
+    return newline + 1
+
+
+def _process_chunk(chunk, render):
+    lines = chunk.decode('utf-8', 'surrogateescape').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return ''.join(render(line.strip()) + '\n' for line in lines) \
+        .encode('utf-8', 'surrogateescape'), len(lines)
+
+
+def _read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_checkpoint(path, state):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def bulk_demangle(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                  checkpoint_path=None, render=demangle):
+    """
+    Demangle every line of `input_path` into `output_path`, resuming from the checkpoint
+    at `checkpoint_path` (by default, `output_path` with `.checkpoint` appended) if there
+    is one. Returns the number of lines processed by this call.
+
+    Raises `ValueError` if the checkpoint was recorded for an input of a different size or
+    for a different output path, or if the output is shorter than recorded.
+    """
+    if checkpoint_path is None:
+        checkpoint_path = output_path + '.checkpoint'
+
+    input_size = os.path.getsize(input_path)
+    output_abspath = os.path.abspath(output_path)
+    input_offset = output_offset = 0
+    checkpoint = _read_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        if checkpoint['input_size'] != input_size:
+            raise ValueError("checkpoint {} was recorded for a different input"
+                             .format(checkpoint_path))
+        if checkpoint.get('output_path') != output_abspath:
+            raise ValueError("checkpoint {} was recorded for a different output"
+                             .format(checkpoint_path))
+        input_offset = checkpoint['input_offset']
+        output_offset = checkpoint['output_offset']
+        if not os.path.exists(output_path) or \
+                os.path.getsize(output_path) < output_offset:
+            raise ValueError("output {} is shorter than recorded in checkpoint {}"
+                             .format(output_path, checkpoint_path))
+
+    lines = 0
+    with open(input_path, 'rb') as input_file, \
+            open(output_path, 'r+b' if checkpoint is not None else 'wb') as output_file:
+        output_file.truncate(output_offset)
+        output_file.seek(output_offset)
+        if input_size > 0:
+            with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                while input_offset < input_size:
+                    end = _chunk_end(buffer, input_offset, chunk_size)
+                    output, chunk_lines = _process_chunk(buffer[input_offset:end], render)
+                    output_file.write(output)
+                    output_file.flush()
+                    os.fsync(output_file.fileno())
+
+                    lines += chunk_lines
+                    input_offset = end
+                    output_offset += len(output)
+                    _write_checkpoint(checkpoint_path, {
+                        'input_size': input_size,
+                        'output_path': output_abspath,
+                        'input_offset': input_offset,
+                        'output_offset': output_offset,
+                    })
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return lines
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.bulk',
+        description='Demangle a file with one symbol per line, resuming if interrupted.')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, metavar='BYTES',
+                        help='approximate size of input chunks (default: %(default)s)')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='checkpoint file (default: OUTPUT.checkpoint)')
+    args = parser.parse_args()
+    bulk_demangle(args.input, args.output, args.chunk_size, args.checkpoint)
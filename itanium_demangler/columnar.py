@@ -0,0 +1,224 @@
+# encoding:utf-8
+"""
+Column-oriented batch demangling.
+
+`demangle_columns` parses a sequence of symbols and appends the interesting parts of every
+AST straight into flat column buffers, so that loading millions of symbols into a dataframe
+does not require building and flattening a Python object per symbol.
+
+Columns:
+    * `kind` (`array('B')`): an index into `KINDS`; `"func"` and `"data"` for plain entities,
+      the special node kind (`"vtable"`, `"typeinfo"`, `"nonvirt_thunk"`, ...) otherwise, and
+      `"error"` for symbols that could not be demangled
+    * `namespace` (`StringColumn`): the enclosing scopes, joined with `::`
+    * `cls` (`StringColumn`): the innermost enclosing scope of the entity; for RTTI symbols,
+      the described type itself. The mangling does not distinguish classes from namespaces,
+      so for free functions this holds the innermost namespace
+    * `name` (`StringColumn`): the unqualified entity name, without template arguments
+    * `tpl_args` (`StringColumn`): the template arguments of the entity, if any, e.g. `<int>`
+    * `arity` (`array('i')`): the number of function arguments, or -1 if not a function
+
+String columns use the Arrow "large string" layout: an `array('q')` of `len + 1` offsets
+into a UTF-8 byte heap.
+"""
+
+from array import array
+
+from . import parse, Node
+
+
+KINDS = (
+    'error',
+    'func',
+    'data',
+    'vtable',
+    'vtt',
+    'typeinfo',
+    'typeinfo_name',
+    'nonvirt_thunk',
+    'virt_thunk',
+    'guard_variable',
+    'transaction_clone',
+    'covariant_thunk',
+    'extended_temporary',
+)
+
+_kind_codes = {kind: code for code, kind in enumerate(KINDS)}
+
+_rtti_kinds = ('vtable', 'vtt', 'typeinfo', 'typeinfo_name')
+
+
+class StringColumn:
+    def __init__(self):
+        self.offsets = array('q', [0])
+        self.data = bytearray()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def append(self, value):
+        if value:
+            self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def buffers(self):
+        return self.offsets, self.data
+
+    def to_arrow(self):
+        import pyarrow
+        return pyarrow.Array.from_buffers(pyarrow.large_string(), len(self),
+                                          [None, pyarrow.py_buffer(self.offsets),
+                                           pyarrow.py_buffer(self.data)])
+
+
+class SymbolColumns:
+    _string_columns = ('namespace', 'cls', 'name', 'tpl_args')
+
+    def __init__(self):
+        self.kind = array('B')
+        self.namespace = StringColumn()
+        self.cls = StringColumn()
+        self.name = StringColumn()
+        self.tpl_args = StringColumn()
+        self.arity = array('i')
+
+    def __len__(self):
+        return len(self.kind)
+
+    def extend(self, symbols):
+        for symbol in symbols:
+            self.append(symbol)
+
+    def append(self, symbol):
+        try:
+            ast = parse(symbol)
+        except NotImplementedError:
+            ast = None
+        if ast is None:
+            self._append_row('error', (), None, '', None, -1)
+        else:
+            self._append_ast(ast)
+
+    def _append_ast(self, ast):
+        kind = ast.kind
+        if kind in _kind_codes and kind not in ('error', 'func', 'data'):
+            entity = ast.value
+        else:
+            entity, kind = ast, 'data'
+
+        arity = -1
+        if entity.kind == 'func' and entity.name is not None:
+            if kind == 'data':
+                kind = 'func'
+            if entity.arg_tys == (Node('builtin', 'void'),):
+                arity = 0
+            else:
+                arity = len(entity.arg_tys)
+            entity = entity.name
+
+        components = _split_name(entity)
+        if components is None:
+            # not a name at all, e.g. `typeinfo for int*`
+            self._append_row(kind, (), str(entity), '', None, arity)
+        elif kind in _rtti_kinds:
+            self._append_row(kind, components[:-1], _join((components[-1],)), '', None, arity)
+        else:
+            name, tpl_args = components[-1]
+            self._append_row(kind, components[:-2], _join(components[-2:-1]), str(name),
+                             tpl_args, arity)
+
+    def _append_row(self, kind, scopes, cls, name, tpl_args, arity):
+        self.kind.append(_kind_codes[kind])
+        self.namespace.append(_join(scopes))
+        self.cls.append(cls)
+        self.name.append(name)
+        self.tpl_args.append(str(tpl_args) if tpl_args is not None else '')
+        self.arity.append(arity)
+
+    def kinds(self):
+        return [KINDS[code] for code in self.kind]
+
+    def buffers(self):
+        """
+        Return a `dict` mapping each column name to its raw buffers: an `array` for
+        fixed-width columns, or an `(offsets, data)` pair for string columns.
+        """
+        result = {'kind': self.kind, 'arity': self.arity}
+        for column in self._string_columns:
+            result[column] = getattr(self, column).buffers()
+        return result
+
+    def to_arrow(self):
+        """
+        Return the columns as a `pyarrow.Table` without copying the string heaps.
+        The `kind` column is dictionary-encoded against `KINDS`. Requires `pyarrow`.
+        """
+        import pyarrow
+        kind = pyarrow.DictionaryArray.from_arrays(
+            pyarrow.Array.from_buffers(pyarrow.uint8(), len(self),
+                                       [None, pyarrow.py_buffer(self.kind)]),
+            pyarrow.array(KINDS))
+        arity = pyarrow.Array.from_buffers(pyarrow.int32(), len(self),
+                                           [None, pyarrow.py_buffer(self.arity)])
+        columns = [kind] + [getattr(self, column).to_arrow()
+                            for column in self._string_columns] + [arity]
+        names = ['kind'] + list(self._string_columns) + ['arity']
+        return pyarrow.Table.from_arrays(columns, names=names)
+
+
+def _unwrap_name(node):
+    # method cv and ref qualifiers, e.g. `_ZNKR3foo3barEv`, wrap the qualified name itself
+    while node.kind in ('cv_qual', 'lvalue', 'rvalue'):
+        node = node.value
+    return node
+
+def _split_name(node):
+    """
+    Split a name node into a list of `(name, tpl_args)` pairs, one per scope, where
+    `tpl_args` is a `tpl_args` node or `None`. Returns `None` if `node` is not a name.
+    """
+    node = _unwrap_name(node)
+    if node.kind == 'qual_name':
+        components = []
+        for part in node.value:
+            if part.kind == 'tpl_args':
+                if not components:
+                    return None
+                components[-1] = (components[-1][0], part)
+            elif part.kind == 'qual_name':
+                nested = _split_name(part)
+                if nested is None:
+                    return None
+                components += nested
+            else:
+                components.append((part, None))
+        return components or None
+    elif node.kind in ('name', 'ctor', 'dtor', 'oper', 'oper_cast', 'abi'):
+        return [(node, None)]
+    else:
+        return None
+
+def _join(components):
+    result = ''
+    for name, tpl_args in components:
+        if result:
+            result += '::'
+        result += str(name)
+        if tpl_args is not None:
+            result += str(tpl_args)
+    return result
+
+
+def demangle_columns(symbols):
+    """
+    Demangle an iterable of symbols into a new `SymbolColumns`, one row per symbol,
+    in input order.
+    """
+    columns = SymbolColumns()
+    columns.extend(symbols)
+    return columns
@@ -0,0 +1,218 @@
+# encoding:utf-8
+"""
+Differential testing against a reference demangler.
+
+`compare` renders a corpus of symbols with this module and checks every result against the
+output of a reference demangler, normally GNU `c++filt`. The reference output is obtained
+either by running a binary (`reference_demangle`) or from a file recorded earlier with one
+demangled line per input symbol (`load_reference`), so that the comparison can run offline.
+
+Every mismatch is attributed to a production: the kind of the deepest AST node whose
+rendering does not occur verbatim in the reference output. Symbols that do not parse at all
+are attributed to `"unparsed"`, and those that hit an unsupported production to
+`"not_implemented"`.
+
+With `style="cxxfilt"`, symbols are rendered in the format of `c++filt` itself (see
+`itanium_demangler.render`), so that only genuine differences remain; this is what the
+command line interface does unless `--style default` is passed.
+
+`throughput` measures symbols per second for this module and for the reference binary, both
+driven as a persistent pipe (one process reading every symbol from stdin) and as one process
+per symbol, which is how many scripts invoke `c++filt`.
+"""
+
+import re
+import functools
+import subprocess
+import time
+from collections import namedtuple, OrderedDict
+
+from . import parse, demangle, render as render_ast, _Renderable
+
+
+Mismatch = namedtuple('Mismatch', 'symbol output expected production')
+
+
+def normalize_loose(text):
+    """
+    Remove the differences between this module and `c++filt` that are purely typographic,
+    i.e. the space `c++filt` puts between consecutive closing angle brackets.
+    """
+    return re.sub(r'>(?= >)\s', '>', text)
+
+
+def reference_demangle(symbols, command=('c++filt',)):
+    """
+    Demangle `symbols` with a single reference process reading from stdin, and return
+    its output as a list of lines.
+    """
+    output = subprocess.run(command, input='\n'.join(symbols) + '\n', stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True).stdout
+    lines = output.split('\n')[:len(symbols)]
+    if len(lines) != len(symbols):
+        raise ValueError("reference demangler returned {} lines for {} symbols"
+                         .format(len(lines), len(symbols)))
+    return lines
+
+
+def reference_demangle_each(symbols, command=('c++filt',)):
+    """
+    Demangle `symbols` with one reference process per symbol.
+    """
+    return [subprocess.run(list(command) + [symbol], stdout=subprocess.PIPE,
+                           universal_newlines=True, check=True).stdout.rstrip('\n')
+            for symbol in symbols]
+
+
+def load_reference(path):
+    with open(path) as f:
+        return [line.rstrip('\n') for line in f]
+
+
+def _children(node):
+    for field in node[1:]:
+        if isinstance(field, _Renderable):
+            yield field
+        elif isinstance(field, tuple):
+            for item in field:
+                if isinstance(item, _Renderable):
+                    yield item
+
+def culprit(ast, expected, normalize=None, style=None):
+    """
+    Return the deepest node of `ast` whose rendering in `style` does not occur in `expected`,
+    or `None` if the rendering of `ast` is equal to `expected`.
+    """
+    def render(node):
+        text = str(node) if style is None else render_ast(node, style=style)
+        return normalize(text) if normalize else text
+
+    if render(ast) == expected:
+        return None
+    node = ast
+    while True:
+        for child in _children(node):
+            if render(child) not in expected:
+                node = child
+                break
+        else:
+            return node
+
+
+def compare(symbols, expected, render=None, normalize=None, style=None):
+    """
+    Compare `render(symbol)` against the corresponding line of `expected` for each of
+    `symbols`. If `normalize` is given, it is applied to both sides first. By default,
+    symbols are rendered with `demangle` in `style`. Returns a list of `Mismatch` tuples.
+    """
+    if render is None:
+        render = functools.partial(demangle, style=style)
+    mismatches = []
+    for symbol, reference in zip(symbols, expected):
+        output = render(symbol)
+        if normalize is not None:
+            output, reference = normalize(output), normalize(reference)
+        if output == reference:
+            continue
+
+        try:
+            ast = parse(symbol)
+        except NotImplementedError:
+            production = 'not_implemented'
+        else:
+            if ast is None:
+                production = 'unparsed'
+            else:
+                node = culprit(ast, reference, normalize, style)
+                production = node.kind if node is not None else 'render'
+        mismatches.append(Mismatch(symbol, output, reference, production))
+    return mismatches
+
+
+def group_mismatches(mismatches):
+    """
+    Group `mismatches` by production. Returns an `OrderedDict` mapping each production to
+    its list of mismatches, largest group first.
+    """
+    groups = {}
+    for mismatch in mismatches:
+        groups.setdefault(mismatch.production, []).append(mismatch)
+    return OrderedDict(sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])))
+
+
+def throughput(fn, symbols):
+    """
+    Call `fn(symbols)` and return the number of symbols processed per second.
+    """
+    start = time.perf_counter()
+    fn(symbols)
+    elapsed = time.perf_counter() - start
+    return len(symbols) / elapsed if elapsed else float('inf')
+
+
+def _format_rate(name, rate):
+    return "{:<32}{:>12.0f} symbols/s".format(name, rate)
+
+
+if __name__ == '__main__':
+    import sys
+    import shlex
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.compare',
+        description='Compare demangler output and throughput against c++filt.')
+    parser.add_argument('corpus', help='file with one mangled symbol per line')
+    parser.add_argument('--reference', metavar='FILE',
+                        help='recorded reference output, instead of running a binary')
+    parser.add_argument('--record', metavar='FILE',
+                        help='write the reference output to FILE for later offline runs')
+    parser.add_argument('--command', default='c++filt',
+                        help='reference demangler command (default: %(default)s)')
+    parser.add_argument('--style', choices=('cxxfilt', 'default'), default='cxxfilt',
+                        help='rendering style to compare (default: %(default)s)')
+    parser.add_argument('--loose', action='store_true',
+                        help='ignore spaces between closing angle brackets')
+    parser.add_argument('--examples', type=int, default=3, metavar='N',
+                        help='mismatches to print per production (default: %(default)s)')
+    parser.add_argument('--per-process', type=int, default=200, metavar='N',
+                        help='symbols to time with one reference process each '
+                             '(default: %(default)s, 0 to skip)')
+    args = parser.parse_args()
+
+    symbols = [line.strip() for line in open(args.corpus) if line.strip()]
+    command = shlex.split(args.command)
+    if args.reference is not None:
+        expected = load_reference(args.reference)
+        if len(expected) != len(symbols):
+            parser.error("reference has {} lines for {} symbols"
+                         .format(len(expected), len(symbols)))
+    else:
+        expected = reference_demangle(symbols, command)
+    if args.record is not None:
+        with open(args.record, 'w') as f:
+            f.writelines(line + '\n' for line in expected)
+
+    style = None if args.style == 'default' else args.style
+    mismatches = compare(symbols, expected, normalize=normalize_loose if args.loose else None,
+                         style=style)
+    print("{} symbols, {} mismatches".format(len(symbols), len(mismatches)))
+    for production, group in group_mismatches(mismatches).items():
+        print("\n{} ({})".format(production, len(group)))
+        for mismatch in group[:args.examples]:
+            print("  {}\n    ours: {}\n    ref:  {}".format(*mismatch[:3]))
+
+    print()
+    print(_format_rate('itanium_demangler',
+                       throughput(lambda symbols: [demangle(s, style) for s in symbols],
+                                  symbols)))
+    if args.reference is None:
+        print(_format_rate(args.command + ' (pipe)',
+                           throughput(lambda symbols: reference_demangle(symbols, command),
+                                      symbols)))
+        if args.per_process:
+            print(_format_rate(args.command + ' (per process)',
+                               throughput(lambda symbols: reference_demangle_each(symbols,
+                                                                                  command),
+                                          symbols[:args.per_process])))
+    sys.exit(1 if mismatches else 0)
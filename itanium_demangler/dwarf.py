@@ -0,0 +1,360 @@
+# encoding:utf-8
+"""
+Extraction of linkage names from DWARF debug information.
+
+`linkage_names` walks the debugging information entries of every unit in the `.debug_info`
+section (or `.debug_info.dwo`, in split DWARF objects) of an ELF file, and yields the value of
+every `DW_AT_linkage_name` (or pre-DWARF 4 `DW_AT_MIPS_linkage_name`) attribute. DWARF versions
+2 to 5 are supported, in the 32- and 64-bit formats.
+
+The sections are read in place from the memory-mapped file. Every abbreviation is compiled
+once into a list of steps, in which consecutive attributes of fixed size are merged into a
+single skip, so that entries without a linkage name cost a few additions. A linkage name is
+only decoded the first time its offset in the string section is seen, and yielded the first
+time its value is seen, since the same inline functions are described in many units.
+
+Relocations in relocatable files are applied only to references to other debug sections.
+"""
+
+from . import parse
+from .elf import ElfFile
+
+
+DW_AT_linkage_name = 0x6e
+DW_AT_MIPS_linkage_name = 0x2007
+DW_AT_str_offsets_base = 0x72
+
+DW_FORM_string = 0x08
+DW_FORM_strp = 0x0e
+DW_FORM_indirect = 0x16
+DW_FORM_strx = 0x1a
+DW_FORM_line_strp = 0x1f
+DW_FORM_implicit_const = 0x21
+DW_FORM_GNU_str_index = 0x1f02
+
+_fixed_sizes = {
+    0x05: 2, 0x06: 4, 0x07: 8, 0x0b: 1, 0x0c: 1, 0x11: 1, 0x12: 2, 0x13: 4, 0x14: 8,
+    0x19: 0, 0x1c: 4, 0x1e: 16, 0x20: 8, 0x21: 0, 0x24: 8,
+    0x25: 1, 0x26: 2, 0x27: 3, 0x28: 4, 0x29: 1, 0x2a: 2, 0x2b: 3, 0x2c: 4,
+}
+_offset_forms = (0x0e, 0x17, 0x1d, 0x1f, 0x1f20, 0x1f21)
+_leb128_forms = (0x0d, 0x0f, 0x15, 0x1a, 0x1b, 0x22, 0x23, 0x1f01, 0x1f02)
+_block_forms = {0x0a: 1, 0x03: 2, 0x04: 4, 0x09: None, 0x18: None}
+_strx_sizes = {0x1a: None, 0x1f02: None, 0x25: 1, 0x26: 2, 0x27: 3, 0x28: 4}
+
+_linkage_name_attributes = (DW_AT_linkage_name, DW_AT_MIPS_linkage_name)
+
+# compiled steps; an `int` step skips that many bytes
+_SKIP_LEB128, _SKIP_BLOCK, _SKIP_STRING, _INDIRECT, _NAME, _STR_OFFSETS_BASE = range(-6, 0)
+
+
+def _read_uleb128(data, offset):
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+def _skip_leb128(data, offset):
+    while data[offset] & 0x80:
+        offset += 1
+    return offset + 1
+
+
+def _form_size(form, offset_size, address_size, version):
+    if form in _fixed_sizes:
+        return _fixed_sizes[form]
+    elif form in _offset_forms:
+        return offset_size
+    elif form == 0x01:
+        return address_size
+    elif form == 0x10:
+        # DW_FORM_ref_addr was address-sized before DWARF 3
+        return address_size if version == 2 else offset_size
+    return None
+
+
+def _parse_abbreviations(data, offset):
+    abbreviations = {}
+    while True:
+        code, offset = _read_uleb128(data, offset)
+        if code == 0:
+            return abbreviations
+        _, offset = _read_uleb128(data, offset)
+        has_children = data[offset] != 0
+        offset += 1
+        attributes = []
+        while True:
+            attribute, offset = _read_uleb128(data, offset)
+            form, offset = _read_uleb128(data, offset)
+            if attribute == 0 and form == 0:
+                break
+            if form == DW_FORM_implicit_const:
+                offset = _skip_leb128(data, offset)
+            attributes.append((attribute, form))
+        abbreviations[code] = (has_children, tuple(attributes))
+
+
+def _compile_form(attribute, form, offset_size, address_size, version):
+    if attribute in _linkage_name_attributes and \
+            form in (DW_FORM_string, DW_FORM_strp, DW_FORM_line_strp) + tuple(_strx_sizes):
+        return (_NAME, form)
+    elif attribute == DW_AT_str_offsets_base:
+        return (_STR_OFFSETS_BASE, form)
+    size = _form_size(form, offset_size, address_size, version)
+    if size is not None:
+        return size
+    elif form in _leb128_forms:
+        return (_SKIP_LEB128, form)
+    elif form in _block_forms:
+        return (_SKIP_BLOCK, form)
+    elif form == DW_FORM_string:
+        return (_SKIP_STRING, form)
+    elif form == DW_FORM_indirect:
+        return (_INDIRECT, attribute)
+    raise NotImplementedError("DWARF form {:#x} is not supported".format(form))
+
+def _compile(abbreviations, offset_size, address_size, version):
+    compiled = {}
+    for code, (has_children, attributes) in abbreviations.items():
+        steps = []
+        for attribute, form in attributes:
+            step = _compile_form(attribute, form, offset_size, address_size, version)
+            if type(step) is int and steps and type(steps[-1]) is int:
+                steps[-1] += step
+            else:
+                steps.append(step)
+        compiled[code] = tuple(step for step in steps if step != 0)
+    return compiled
+
+
+class _Sections:
+    def __init__(self, elf):
+        self.elf = elf
+        self.suffix = '.dwo' if elf.section('.debug_info') is None else ''
+        self.info = self._load('.debug_info')
+        self.abbrev = self._load('.debug_abbrev')
+        self.str = self._load('.debug_str')
+        self.line_str = self._load('.debug_line_str')
+        self.str_offsets = self._load('.debug_str_offsets')
+
+    def _load(self, name):
+        section = self.elf.section(name + self.suffix)
+        if section is None:
+            return None
+        return self.elf.contents(section) + (self.elf.relocations(section),)
+
+
+class _Unit:
+    def __init__(self, elf, sections, offset):
+        data, start, end, relocations = sections.info
+        self.offset = offset
+        unit_length, = elf.unpack_from('I', offset, data)
+        offset += 4
+        self.offset_size = 4
+        if unit_length == 0xffffffff:
+            unit_length, = elf.unpack_from('Q', offset, data)
+            offset += 8
+            self.offset_size = 8
+        self.end = offset + unit_length
+        self.version, = elf.unpack_from('H', offset, data)
+        offset += 2
+        offset_format = 'I' if self.offset_size == 4 else 'Q'
+        if self.version >= 5:
+            unit_type, self.address_size = data[offset], data[offset + 1]
+            offset += 2
+            abbrev_offset = relocations.get(offset - start) or \
+                elf.unpack_from(offset_format, offset, data)[0]
+            offset += self.offset_size
+            if unit_type in (4, 5):
+                # skeleton and split compilation units have a DWO id
+                offset += 8
+            elif unit_type in (2, 6):
+                # type units have a type signature and offset
+                offset += 8 + self.offset_size
+        elif self.version >= 2:
+            abbrev_offset = relocations.get(offset - start) or \
+                elf.unpack_from(offset_format, offset, data)[0]
+            offset += self.offset_size
+            self.address_size = data[offset]
+            offset += 1
+        else:
+            raise NotImplementedError("DWARF version {} is not supported".format(self.version))
+        self.abbrev_offset = abbrev_offset
+        self.entries = offset
+        if self.end > end:
+            raise ValueError("DWARF unit at {:#x} extends past the end of the section"
+                             .format(self.offset - start))
+
+
+class _Scanner:
+    def __init__(self, elf):
+        self.elf = elf
+        self.sections = _Sections(elf)
+        self._abbreviations = {}
+        self._compiled = {}
+        self._offsets = set()
+
+    def _steps(self, unit):
+        key = (unit.abbrev_offset, unit.offset_size, unit.address_size, unit.version)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            abbreviations = self._abbreviations.get(unit.abbrev_offset)
+            if abbreviations is None:
+                data, start, _, _ = self.sections.abbrev
+                abbreviations = _parse_abbreviations(data, start + unit.abbrev_offset)
+                self._abbreviations[unit.abbrev_offset] = abbreviations
+            compiled = self._compiled[key] = _compile(abbreviations, *key[1:])
+        return compiled
+
+    def _string(self, section, offset):
+        if section is None:
+            raise ValueError("string section is missing")
+        data, start, end, _ = section
+        return self.elf.string_at(start + offset, data)
+
+    def _string_index(self, unit, str_offsets_base, index):
+        if self.sections.str_offsets is None:
+            raise ValueError("string offsets section is missing")
+        data, start, _, relocations = self.sections.str_offsets
+        if str_offsets_base is None:
+            # split units and GNU extensions do not have a base; skip the DWARF 5 header
+            str_offsets_base = 8 if unit.version >= 5 else 0
+        position = str_offsets_base + index * unit.offset_size
+        offset = relocations.get(position) or \
+            self.elf.unpack_from('I' if unit.offset_size == 4 else 'Q', start + position, data)[0]
+        return offset
+
+    def _name(self, unit, form, data, offset, relocations, info_start, str_offsets_base):
+        """
+        Read the linkage name of `form` at `offset`. Returns `(offset, name)`, where `name`
+        is `None` if the same string was already seen.
+        """
+        if form == DW_FORM_string:
+            end = data.find(b'\0', offset)
+            return end + 1, data[offset:end].decode('utf-8', 'surrogateescape')
+        if form in (DW_FORM_strp, DW_FORM_line_strp):
+            string_offset = relocations.get(offset - info_start) or \
+                self.elf.unpack_from('I' if unit.offset_size == 4 else 'Q', offset, data)[0]
+            offset += unit.offset_size
+            section = self.sections.str if form == DW_FORM_strp else self.sections.line_str
+        else:
+            size = _strx_sizes[form]
+            if size is None:
+                index, offset = _read_uleb128(data, offset)
+            else:
+                index = int.from_bytes(data[offset:offset + size],
+                                       'little' if self.elf.byte_order == '<' else 'big')
+                offset += size
+            string_offset = self._string_index(unit, str_offsets_base, index)
+            section = self.sections.str
+        key = (form == DW_FORM_line_strp, string_offset)
+        if key in self._offsets:
+            return offset, None
+        self._offsets.add(key)
+        return offset, self._string(section, string_offset)
+
+    def _unit_names(self, unit):
+        data, info_start, _, relocations = self.sections.info
+        steps = self._steps(unit)
+        offset_format = 'I' if unit.offset_size == 4 else 'Q'
+        str_offsets_base = None
+        offset, end = unit.entries, unit.end
+        while offset < end:
+            code = data[offset]
+            if code & 0x80:
+                code, offset = _read_uleb128(data, offset)
+            else:
+                offset += 1
+            if code == 0:
+                continue
+            for step in steps[code]:
+                if type(step) is int:
+                    offset += step
+                    continue
+                kind, form = step
+                if kind == _INDIRECT:
+                    # the attribute is in place of the form
+                    form, offset = _read_uleb128(data, offset)
+                    step = _compile_form(step[1], form, unit.offset_size, unit.address_size,
+                                         unit.version)
+                    if type(step) is int:
+                        offset += step
+                        continue
+                    kind, form = step
+                if kind == _NAME:
+                    offset, name = self._name(unit, form, data, offset, relocations,
+                                              info_start, str_offsets_base)
+                    if name is not None:
+                        yield name
+                elif kind == _STR_OFFSETS_BASE:
+                    str_offsets_base = relocations.get(offset - info_start) or \
+                        self.elf.unpack_from(offset_format, offset, data)[0]
+                    offset += unit.offset_size
+                elif kind == _SKIP_LEB128:
+                    offset = _skip_leb128(data, offset)
+                elif kind == _SKIP_BLOCK:
+                    size = _block_forms[form]
+                    if size is None:
+                        length, offset = _read_uleb128(data, offset)
+                    else:
+                        length = int.from_bytes(data[offset:offset + size],
+                                                'little' if self.elf.byte_order == '<'
+                                                else 'big')
+                        offset += size
+                    offset += length
+                elif kind == _SKIP_STRING:
+                    offset = data.find(b'\0', offset) + 1
+
+    def names(self):
+        if self.sections.info is None:
+            return
+        data, start, end, _ = self.sections.info
+        offset = start
+        while offset < end:
+            unit = _Unit(self.elf, self.sections, offset)
+            for name in self._unit_names(unit):
+                yield name
+            offset = unit.end
+
+
+def linkage_names(elf, seen=None):
+    """
+    Iterate over the linkage names in the debug information of `elf`, an `ElfFile`, skipping
+    the names already in the set `seen`, if any, and adding the rest to it.
+    """
+    if seen is None:
+        seen = set()
+    for name in _Scanner(elf).names():
+        if name not in seen:
+            seen.add(name)
+            yield name
+
+
+def parse_linkage_names(paths, seen=None):
+    """
+    Iterate over `(name, ast)` pairs for the unique linkage names in the debug information
+    of the ELF files at `paths`, where `ast` is `None` if the name cannot be parsed.
+    """
+    if seen is None:
+        seen = set()
+    for path in paths:
+        with ElfFile.open(path) as elf:
+            for name in linkage_names(elf, seen):
+                try:
+                    ast = parse(name)
+                except NotImplementedError:
+                    ast = None
+                yield name, ast
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python -m itanium_demangler.dwarf FILE...", file=sys.stderr)
+        sys.exit(2)
+    for name, ast in parse_linkage_names(sys.argv[1:]):
+        print(name if ast is None else ast)
@@ -0,0 +1,223 @@
+# encoding:utf-8
+"""
+A minimal reader for ELF object files.
+
+`ElfFile` reads the file header and the section headers of a 32- or 64-bit, little- or
+big-endian ELF file held in any buffer, such as `bytes` or an `mmap`, and gives access to
+the contents of sections by offset into that buffer, without copying them. Only sections
+compressed with `SHF_COMPRESSED` are copied, when they are decompressed. `ElfFile.symbols`
+reads the symbol table.
+"""
+
+import mmap
+import zlib
+import struct
+from collections import namedtuple
+
+
+ET_REL = 1
+
+SHT_SYMTAB = 2
+SHT_RELA = 4
+SHT_REL = 9
+SHT_DYNSYM = 11
+
+SHN_UNDEF = 0
+
+STT_OBJECT = 1
+STT_FUNC = 2
+STT_SECTION = 3
+STT_FILE = 4
+STT_GNU_IFUNC = 10
+
+SHF_COMPRESSED = 0x800
+
+ELFCOMPRESS_ZLIB = 1
+
+
+Section = namedtuple('Section', 'index name type flags address offset size link info entsize')
+
+Symbol = namedtuple('Symbol', 'name value size type bind section_index')
+
+
+class ElfFile:
+    """
+    An ELF file in the buffer `data`. Raises `ValueError` if `data` is not an ELF file.
+    """
+
+    def __init__(self, data):
+        if data[:4] != b'\x7fELF':
+            raise ValueError("not an ELF file")
+        if data[4] not in (1, 2) or data[5] not in (1, 2):
+            raise ValueError("unsupported ELF class or data encoding")
+        self.data = data
+        self.is_64bit = data[4] == 2
+        self.byte_order = '<' if data[5] == 1 else '>'
+        self._mmap = None
+        self._file = None
+
+        if self.is_64bit:
+            header = self.unpack_from('HHIQQQIHHHHHH', 16)
+        else:
+            header = self.unpack_from('HHIIIIIHHHHHH', 16)
+        self.type, self.machine = header[0:2]
+        shoff, shentsize, shnum, shstrndx = header[5], header[10], header[11], header[12]
+
+        self.sections = []
+        if shoff == 0:
+            return
+        if self.is_64bit:
+            section_format = 'IIQQQQIIQQ'
+        else:
+            section_format = 'IIIIIIIIII'
+        headers = []
+        first = self.unpack_from(section_format, shoff)
+        if shnum == 0:
+            # more than SHN_LORESERVE sections; the count is in the first section header
+            shnum = first[5]
+        if shstrndx == 0xffff:
+            shstrndx = first[6]
+        for index in range(shnum):
+            headers.append(self.unpack_from(section_format, shoff + index * shentsize))
+
+        names_offset = headers[shstrndx][4] if shstrndx < len(headers) else None
+        for index, (name, type, flags, address, offset, size, link, info, _, entsize) \
+                in enumerate(headers):
+            if names_offset is not None:
+                name = self.string_at(names_offset + name)
+            else:
+                name = ''
+            self.sections.append(Section(index, name, type, flags, address, offset, size,
+                                         link, info, entsize))
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-map the file at `path`. The returned `ElfFile` should be closed with `close`,
+        or used as a context manager.
+        """
+        file = open(path, 'rb')
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            data = b''
+        try:
+            elf = cls(data)
+        except BaseException:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            file.close()
+            raise
+        elf._file = file
+        elf._mmap = data if isinstance(data, mmap.mmap) else None
+        return elf
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def unpack_from(self, format, offset, data=None):
+        return struct.unpack_from(self.byte_order + format, self.data if data is None else data,
+                                  offset)
+
+    def string_at(self, offset, data=None):
+        """
+        Return the NUL-terminated string at `offset` of `data` (by default, the whole file).
+        """
+        if data is None:
+            data = self.data
+        end = data.find(b'\0', offset)
+        if end < 0:
+            raise ValueError("unterminated string at offset {:#x}".format(offset))
+        return data[offset:end].decode('utf-8', 'surrogateescape')
+
+    def section(self, name):
+        """
+        Return the first `Section` named `name`, or `None` if there isn't one.
+        """
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    def contents(self, section):
+        """
+        Return a `(buffer, start, end)` tuple locating the contents of `section`. For sections
+        that are not compressed, `buffer` is the whole file.
+        """
+        if not section.flags & SHF_COMPRESSED:
+            return self.data, section.offset, section.offset + section.size
+        if self.is_64bit:
+            compression, _, size, _ = self.unpack_from('IIQQ', section.offset)
+            header_size = 24
+        else:
+            compression, size, _ = self.unpack_from('III', section.offset)
+            header_size = 12
+        if compression != ELFCOMPRESS_ZLIB:
+            raise NotImplementedError("section {} is compressed with an unsupported algorithm"
+                                      .format(section.name))
+        start = section.offset + header_size
+        data = zlib.decompress(self.data[start:section.offset + section.size])
+        if len(data) != size:
+            raise ValueError("section {} decompresses to {} bytes instead of {}"
+                             .format(section.name, len(data), size))
+        return data, 0, size
+
+    def relocations(self, section):
+        """
+        Return a `dict` mapping offsets within `section` to the addends of the relocations
+        that apply to them, for relocatable files with `SHT_RELA` relocation sections.
+        Relocations against symbols other than sections are not resolved, which is enough for
+        references between debug sections.
+        """
+        relocations = {}
+        if self.type != ET_REL:
+            return relocations
+        for relocation_section in self.sections:
+            if relocation_section.type != SHT_RELA or \
+                    relocation_section.info != section.index:
+                continue
+            data, start, end = self.contents(relocation_section)
+            format, size = ('QQq', 24) if self.is_64bit else ('IIi', 12)
+            for position in range(start, end, size):
+                r_offset, _, r_addend = self.unpack_from(format, position, data)
+                relocations[r_offset] = r_addend
+        return relocations
+
+    def symbols(self):
+        """
+        Return an iterator over the `Symbol`s of the symbol table, or of the dynamic symbol
+        table if the file has been stripped. `type` and `bind` are the `STT_*` and `STB_*`
+        values, and `value` is an address, or a section offset in relocatable files.
+        """
+        symbol_tables = [section for section in self.sections if section.type == SHT_SYMTAB]
+        if not symbol_tables:
+            symbol_tables = [section for section in self.sections
+                             if section.type == SHT_DYNSYM]
+        for section in symbol_tables:
+            data, start, end = self.contents(section)
+            names_data, names_start, _ = self.contents(self.sections[section.link])
+            if self.is_64bit:
+                format, size = 'IBBHQQ', 24
+            else:
+                format, size = 'IIIBBH', 16
+            for position in range(start + size, end - size + 1, size):
+                if self.is_64bit:
+                    name, info, _, section_index, value, symbol_size = \
+                        self.unpack_from(format, position, data)
+                else:
+                    name, value, symbol_size, info, _, section_index = \
+                        self.unpack_from(format, position, data)
+                yield Symbol(self.string_at(names_start + name, names_data), value,
+                             symbol_size, info & 0xf, info >> 4, section_index)
@@ -0,0 +1,142 @@
+# encoding:utf-8
+"""
+JSON Lines export of parsed ASTs.
+
+Every node is encoded as a JSON object whose keys are the node fields in declaration order,
+starting with `"kind"`, e.g. `{"kind":"pointer","value":{"kind":"builtin","value":"int"}}`.
+Field values are encoded as follows:
+    * nodes as objects
+    * `tuple`s as arrays
+    * `frozenset`s (`cv_qual` qualifiers and `abi` tags) as sorted arrays of strings
+    * `str` and `int` as themselves, and `None` as `null`
+
+Each line written by `write_jsonl` describes one symbol as
+`{"symbol":...,"demangled":...,"ast":...}`, where `"ast"` is `null` and `"demangled"` is
+the symbol itself if it cannot be demangled. `"demangled"` is omitted if rendering is turned
+off.
+
+The encoder appends string fragments to a single list in one pass over the tree, and the
+key prefix of every field of every node class is built only once.
+"""
+
+from json.encoder import encode_basestring
+
+from . import parse, _Renderable, _Span
+
+
+_field_prefixes = {}
+
+
+def _prefixes(cls):
+    prefixes = tuple(('{' if index == 0 else ',') + encode_basestring(field) + ':'
+                     for index, field in enumerate(cls._fields))
+    _field_prefixes[cls] = prefixes
+    return prefixes
+
+for _cls in _Renderable.__subclasses__():
+    _prefixes(_cls)
+
+
+def _encode(value, parts):
+    cls = type(value)
+    prefixes = _field_prefixes.get(cls)
+    if prefixes is None and isinstance(value, _Renderable):
+        prefixes = _prefixes(cls)
+    if prefixes is not None:
+        for prefix, field in zip(prefixes, value):
+            parts.append(prefix)
+            if type(field) is str:
+                parts.append(encode_basestring(field))
+            else:
+                _encode(field, parts)
+        parts.append('}')
+    elif cls is str or cls is _Span:
+        parts.append(encode_basestring(str(value)))
+    elif cls is tuple:
+        if not value:
+            parts.append('[]')
+            return
+        separator = '['
+        for item in value:
+            parts.append(separator)
+            _encode(item, parts)
+            separator = ','
+        parts.append(']')
+    elif cls is frozenset:
+        parts.append('[' + ','.join(map(encode_basestring, sorted(value))) + ']')
+    elif value is None:
+        parts.append('null')
+    elif isinstance(value, int):
+        parts.append(str(int(value)))
+    else:
+        raise TypeError("cannot encode {!r}".format(value))
+
+
+def encode_ast(ast):
+    """
+    Encode `ast`, which may be `None`, as a JSON `str`.
+    """
+    parts = []
+    _encode(ast, parts)
+    return ''.join(parts)
+
+
+def _encode_symbol(symbol, parts, demangled):
+    try:
+        ast = parse(symbol)
+    except NotImplementedError:
+        ast = None
+    parts.append('{"symbol":')
+    parts.append(encode_basestring(symbol))
+    if demangled:
+        parts.append(',"demangled":')
+        parts.append(encode_basestring(symbol if ast is None else str(ast)))
+    parts.append(',"ast":')
+    _encode(ast, parts)
+    parts.append('}\n')
+
+
+def encode_symbol(symbol, demangled=True):
+    """
+    Parse `symbol` and return its JSON Lines record, including the trailing newline.
+    """
+    parts = []
+    _encode_symbol(symbol, parts, demangled)
+    return ''.join(parts)
+
+
+def write_jsonl(symbols, file, demangled=True, batch_size=1024):
+    """
+    Write one JSON Lines record per symbol of `symbols` to the text `file`, in batches of
+    `batch_size` records per `write` call. Returns the number of records written.
+    """
+    count = 0
+    parts = []
+    for symbol in symbols:
+        _encode_symbol(symbol, parts, demangled)
+        count += 1
+        if count % batch_size == 0:
+            file.write(''.join(parts))
+            parts = []
+    if parts:
+        file.write(''.join(parts))
+    return count
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.jsonl',
+        description='Export parsed symbols, one per line, as JSON Lines.')
+    parser.add_argument('input', nargs='?', help='file with one symbol per line '
+                                                  '(default: standard input)')
+    parser.add_argument('--no-demangled', action='store_true',
+                        help='omit the rendered "demangled" field')
+    args = parser.parse_args()
+
+    input_file = open(args.input) if args.input else sys.stdin
+    with input_file:
+        write_jsonl((line.strip() for line in input_file if line.strip()), sys.stdout,
+                    demangled=not args.no_demangled)
@@ -0,0 +1,100 @@
+# encoding:utf-8
+"""
+Symbols of GNU ld link maps.
+
+`read_linker_map` reads the memory map of a link map written by GNU ld with `-Map`, and
+yields the symbols it lists, with their address, the input section that contains them and
+the input file of that section, e.g. `libfoo.a(bar.o)`. Linker script assignments, such as
+`. = ALIGN (0x8)` or `PROVIDE (end = .)`, are skipped.
+
+Link maps list symbols mangled only if the link was done with `--no-demangle`; names that
+are already demangled are yielded as they are, and do not parse. Symbols imported from shared
+libraries are listed with their version, e.g. `_ZNSaIcED2Ev@@GLIBCXX_3.4`, which is stripped
+before the name is parsed.
+"""
+
+import re
+from collections import namedtuple
+
+from . import parse
+
+
+MapSymbol = namedtuple('MapSymbol', 'name address section file')
+
+_MEMORY_MAP_HEADER = 'Linker script and memory map'
+
+# ` .text._Z1fv   0x0000000000001000   0x10 foo.o`, with the name on a line of its own
+# if it is long
+_INPUT_SECTION_RE = re.compile(r"^ (?P<section>[^\s*]\S*)"
+                               r"(?:\s+0x[0-9a-fA-F]+\s+0x[0-9a-fA-F]+\s+(?P<file>.*))?$")
+# the address and size of a section whose name is on the line above
+_SECTION_CONTINUED_RE = re.compile(r"^\s+0x[0-9a-fA-F]+\s+0x[0-9a-fA-F]+(?:\s+(?P<file>.*))?$")
+_SYMBOL_RE = re.compile(r"^\s+0x(?P<address>[0-9a-fA-F]+)\s+(?P<name>[^\s].*)$")
+
+
+def _is_symbol(name):
+    # not an assignment, nor a note such as `(size before relaxing)`
+    return '=' not in name and not name.startswith(('PROVIDE', 'HIDDEN', 'ASSERT', '('))
+
+
+def read_linker_map(lines):
+    """
+    Return an iterator over the `MapSymbol`s of the link map with the text lines `lines`.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if line.startswith(_MEMORY_MAP_HEADER):
+            break
+
+    section = file = None
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.startswith(' '):
+            # an output section, or a command of the linker script
+            section = file = None
+            continue
+        match = _INPUT_SECTION_RE.match(line)
+        if match is not None:
+            section, file = match.group('section'), match.group('file')
+            continue
+        match = _SECTION_CONTINUED_RE.match(line)
+        if match is not None:
+            if section is not None and file is None:
+                file = match.group('file')
+            continue
+        match = _SYMBOL_RE.match(line)
+        if match is not None and _is_symbol(match.group('name')):
+            yield MapSymbol(match.group('name').rstrip(), int(match.group('address'), 16),
+                            section, file)
+
+
+def parse_linker_map(path, seen=None):
+    """
+    Iterate over `(name, ast)` pairs for the unique symbol names in the link map at `path`,
+    where `ast` is `None` if the name cannot be parsed. `name` includes the symbol version,
+    if any.
+    """
+    if seen is None:
+        seen = set()
+    with open(path, errors='surrogateescape') as f:
+        for symbol in read_linker_map(f):
+            if symbol.name in seen:
+                continue
+            seen.add(symbol.name)
+            try:
+                ast = parse(symbol.name.split('@', 1)[0])
+            except NotImplementedError:
+                ast = None
+            yield symbol.name, ast
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 2:
+        print("Usage: python -m itanium_demangler.linkmap FILE", file=sys.stderr)
+        sys.exit(2)
+    for name, ast in parse_linker_map(sys.argv[1]):
+        if ast is None:
+            print(name)
+        else:
+            print(str(ast) + name[len(name.split('@', 1)[0]):])
@@ -0,0 +1,636 @@
+# encoding:utf-8
+"""
+Mangling of ASTs back into Itanium ABI symbols.
+
+`mangle` is the inverse of `parse`: it turns an AST built from the node types of this
+package into a canonical mangled name, compressing repeated components into substitutions
+(`S_`, `S0_`, ...) in the same order as the parser records them. `parse_demangled` builds
+such an AST from a human-written declaration, so that a name can be looked up in a symbol
+table without demangling the table:
+
+    >>> mangle(parse_demangled('foo::bar(int, char const*)'))
+    '_ZN3foo3barEiPKc'
+
+Parsing loses some details of a symbol, so the following are mangled canonically rather than
+reproduced:
+    * in the signature of a function template, every type equal to a template argument is
+      mangled as a reference to the corresponding template parameter (e.g. `T_`), which is
+      how the signature of a template is usually written;
+    * template argument packs are not distinguished from separate template arguments;
+    * qualified names used as template arguments are mangled as types, even where they
+      were mangled as unresolved names in an expression (`sr`);
+    * an operator that exists in unary and binary form is mangled as binary, e.g. `operator-`
+      as `mi`, unless it is a function without parameters.
+
+Constructs whose details are not kept in the AST, such as thunk offsets, raise
+`NotImplementedError`; ASTs that do not describe a symbol raise `ValueError`.
+"""
+
+import re
+
+from . import Node, QualNode, CastNode, FuncNode, _ctor_dtor_map, _std_names, _operators, \
+    _builtin_types, _unary_operators, _named_casts, _template_args
+
+
+_builtin_codes = {node: code for code, node in _builtin_types.items()}
+
+_std_codes = {names: code for code, names in _std_names.items()}
+
+_ctor_codes = {value: code for code, value in _ctor_dtor_map.items() if code[0] == 'C'}
+
+_dtor_codes = {value: code for code, value in _ctor_dtor_map.items() if code[0] == 'D'}
+
+_unary_codes = {_operators[code]: code for code in _unary_operators}
+
+_binary_codes = {op: code for code, op in _operators.items()
+                 if code not in _unary_operators}
+
+_cast_codes = {op: code for code, op in _named_casts.items()}
+
+_cv_codes = (('restrict', 'r'), ('volatile', 'V'), ('const', 'K'))
+
+_special_codes = {
+    'vtable': 'TV',
+    'vtt': 'TT',
+    'typeinfo': 'TI',
+    'typeinfo_name': 'TS',
+    'guard_variable': 'GV',
+}
+
+_std = Node('name', 'std')
+
+_void = Node('builtin', 'void')
+
+
+def _base36(number):
+    digits = ''
+    while True:
+        number, digit = divmod(number, 36)
+        digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[digit] + digits
+        if number == 0:
+            return digits
+
+def _seq_id(index):
+    return '' if index == 0 else _base36(index - 1)
+
+def _source_name(name):
+    # `name` may be a span, see `parse`
+    return str(len(name)) + str(name)
+
+def _flatten(parts):
+    result = []
+    for part in parts:
+        if part.kind == 'qual_name':
+            result += _flatten(part.value)
+        else:
+            result.append(part)
+    return tuple(result)
+
+def _key(node):
+    # equal names are equal entities, however the parser happened to nest them; a prefix
+    # consisting of a single component is the same entity as the component itself
+    if node.kind == 'qual_name':
+        parts = _flatten(node.value)
+        if len(parts) == 1:
+            return parts[0]
+        return Node('qual_name', parts)
+    return node
+
+def _is_template(name):
+    while name.kind in ('cv_qual', 'lvalue', 'rvalue'):
+        name = name.value
+    if name.kind == 'local_name':
+        return _is_template(name.entity)
+    return name.kind == 'qual_name' and len(name.value) > 1 and \
+        name.value[-1].kind == 'tpl_args' and \
+        name.value[-2].kind not in ('ctor', 'dtor', 'oper_cast')
+
+def _parameterize(node, tpl_args):
+    params = {}
+    for index, arg in enumerate(tpl_args):
+        params.setdefault(arg, Node('tpl_param', index))
+    def mapper(node):
+        if node.kind == 'literal':
+            # the type of a literal is always mangled as a builtin type
+            return node
+        param = params.get(node)
+        if param is not None:
+            return param
+        return node.map(mapper)
+    return mapper(node) if node is not None else None
+
+
+class _Mangler:
+    def __init__(self):
+        self._substs = []
+
+    def _find_subst(self, node):
+        try:
+            return 'S' + _seq_id(self._substs.index(_key(node))) + '_'
+        except ValueError:
+            return None
+
+    def _add_subst(self, node):
+        key = _key(node)
+        if key not in self._substs:
+            self._substs.append(key)
+
+    def mangled_name(self, ast):
+        if ast.kind in _special_codes:
+            return '_Z' + _special_codes[ast.kind] + self.type(ast.value)
+        elif ast.kind in ('nonvirt_thunk', 'virt_thunk', 'covariant_thunk'):
+            raise NotImplementedError("thunk offsets are not preserved in the AST")
+        elif ast.kind == 'transaction_clone':
+            return '_ZGTt' + self.encoding(ast.value)
+        elif ast.kind == 'extended_temporary':
+            return '_ZGR' + self.name(ast.value) + _seq_id(ast.index) + '_'
+        return '_Z' + self.encoding(ast)
+
+    def encoding(self, node):
+        if node.kind != 'func' or node.name is None:
+            return self.name(node)
+
+        arg_tys, ret_ty = (), node.ret_ty
+        for arg_ty in node.arg_tys:
+            if arg_ty.kind == 'expand_arg_pack' and arg_ty.value.kind == 'tpl_arg_pack':
+                arg_tys += arg_ty.value.value
+            else:
+                arg_tys += (arg_ty,)
+        result = self.name(node.name, arity=0 if arg_tys == (_void,) else None)
+        tpl_args = _template_args(node.name)
+        if tpl_args is not None:
+            arg_tys = tuple(_parameterize(arg_ty, tpl_args) for arg_ty in arg_tys)
+            ret_ty = _parameterize(ret_ty, tpl_args)
+        if _is_template(node.name):
+            if ret_ty is None:
+                raise ValueError("function template {} has no return type".format(node.name))
+            result += self.type(ret_ty)
+        if not arg_tys:
+            if tpl_args is not None:
+                # an empty argument pack, which is expanded away by the parser
+                raise NotImplementedError("function {} has an empty argument pack"
+                                          .format(node.name))
+            raise ValueError("function {} has no argument types".format(node.name))
+        for arg_ty in arg_tys:
+            result += self.type(arg_ty)
+        return result
+
+    def name(self, node, arity=None):
+        if node.kind in ('cv_qual', 'lvalue', 'rvalue'):
+            # method qualifiers
+            qualifiers, ref = '', ''
+            if node.kind != 'cv_qual':
+                ref = 'R' if node.kind == 'lvalue' else 'O'
+                node = node.value
+            if node.kind == 'cv_qual':
+                qualifiers = ''.join(code for qual, code in _cv_codes if qual in node.qual)
+                node = node.value
+            if node.kind != 'qual_name':
+                raise ValueError("method qualifiers on unqualified name {}".format(node))
+            return self.nested_name(Node('qual_name', _flatten(node.value)), qualifiers + ref,
+                                    arity)
+        elif node.kind == 'qual_name':
+            parts = _flatten(node.value)
+            if parts in _std_codes:
+                return _std_codes[parts]
+            elif len(parts) == 2 and parts[1].kind == 'tpl_args':
+                return self.unscoped_template_name(parts[0]) + self.type(parts[1])
+            elif len(parts) == 2 and parts[0] == _std:
+                return 'St' + self.name(parts[1], arity)
+            elif len(parts) == 3 and parts[0] == _std and parts[2].kind == 'tpl_args':
+                prefix = Node('qual_name', parts[:2])
+                if parts[:2] in _std_codes:
+                    return _std_codes[parts[:2]] + self.type(parts[2])
+                return self.unscoped_template_name(prefix) + self.type(parts[2])
+            elif len(parts) == 1:
+                return self.name(parts[0], arity)
+            return self.nested_name(Node('qual_name', parts), '', arity)
+        elif node.kind == 'local_name':
+            result = 'Z' + self.encoding(node.func) + 'E'
+            if node.entity.kind == 'string_literal':
+                result += 's'
+            else:
+                result += self.name(node.entity)
+            if node.disc is not None:
+                result += '_' + str(node.disc) if node.disc < 10 else '__' + str(node.disc) + '_'
+            return result
+        return self.unqualified_name(node, arity)
+
+    def unscoped_template_name(self, node):
+        subst = self._find_subst(node)
+        if subst is not None:
+            return subst
+        if node.kind == 'qual_name':
+            result = 'St' + self.unqualified_name(node.value[1])
+        else:
+            result = self.unqualified_name(node)
+        self._add_subst(node)
+        return result
+
+    def nested_name(self, node, qualifiers, arity=None):
+        parts = node.value
+        result = 'N' + qualifiers
+        index = 0
+        for prefix_len in range(len(parts) - 1, 0, -1):
+            subst = self._find_subst(Node('qual_name', parts[:prefix_len]))
+            if subst is not None:
+                result += subst
+                index = prefix_len
+                break
+
+        while index < len(parts):
+            part = parts[index]
+            is_subst = False
+            if part == _std:
+                if index != 0 or index + 1 == len(parts):
+                    raise ValueError("misplaced std:: in {}".format(node))
+                if parts[:2] in _std_codes:
+                    result += _std_codes[parts[:2]]
+                    is_subst = True
+                else:
+                    result += 'St' + self.unqualified_name(parts[1])
+                index += 2
+            elif part.kind == 'tpl_args':
+                if index == 0:
+                    raise ValueError("template arguments without a name in {}".format(node))
+                result += self.type(part)
+                index += 1
+            elif part.kind == 'tpl_param':
+                result += self.unqualified_name(part)
+                is_subst = True
+                index += 1
+            elif part.kind == 'ctor' or part.kind == 'dtor':
+                if index == 0:
+                    raise ValueError("constructor or destructor without a class in {}"
+                                     .format(node))
+                result += self.unqualified_name(part)
+                index += 1
+            else:
+                result += self.unqualified_name(part, arity if index + 1 == len(parts) else None)
+                index += 1
+            if index < len(parts) and not is_subst:
+                self._add_subst(Node('qual_name', parts[:index]))
+        return result + 'E'
+
+    def unqualified_name(self, node, arity=None):
+        if node.kind == 'name':
+            return _source_name(node.value)
+        elif node.kind == 'ctor':
+            return _ctor_codes[node.value]
+        elif node.kind == 'dtor':
+            return _dtor_codes[node.value]
+        elif node.kind == 'oper':
+            if node.value in _unary_codes and (node.value not in _binary_codes or arity == 0):
+                return _unary_codes[node.value]
+            elif node.value in _binary_codes:
+                return _binary_codes[node.value]
+            raise ValueError("unknown operator {}".format(node.value))
+        elif node.kind == 'oper_cast':
+            return 'cv' + self.type(node.value)
+        elif node.kind == 'tpl_param':
+            subst = self._find_subst(node)
+            if subst is not None:
+                return subst
+            self._add_subst(node)
+            return 'T' + ('' if node.value == 0 else str(node.value - 1)) + '_'
+        elif node.kind == 'abi':
+            return self.unqualified_name(node.value) + \
+                ''.join('B' + _source_name(tag) for tag in sorted(node.qual))
+        elif node.kind == 'unnamed_type':
+            return 'Ut' + ('' if node.value == 1 else str(node.value - 2)) + '_'
+        elif node.kind == 'closure':
+            return 'Ul' + ''.join(map(self.type, node.arg_tys)) + 'E' + \
+                ('' if node.index == 1 else str(node.index - 2)) + '_'
+        raise ValueError("{} is not a name".format(node))
+
+    def type(self, node):
+        code = _builtin_codes.get(node)
+        if code is not None:
+            return code
+        if node.kind == 'tpl_args':
+            return 'I' + ''.join(map(self.template_arg, node.value)) + 'E'
+
+        subst = self._find_subst(node)
+        if subst is not None:
+            return subst
+        if node.kind in ('name', 'qual_name', 'tpl_param', 'abi', 'local_name',
+                         'unnamed_type', 'closure'):
+            result = self.name(node)
+        elif node.kind in ('pointer', 'lvalue', 'rvalue'):
+            result = {'pointer': 'P', 'lvalue': 'R', 'rvalue': 'O'}[node.kind] + \
+                self.type(node.value)
+        elif node.kind == 'cv_qual':
+            result = ''.join(code for qual, code in _cv_codes if qual in node.qual) + \
+                self.type(node.value)
+        elif node.kind == 'func' and node.name is None:
+            result = 'F' + self.type(node.ret_ty) + ''.join(map(self.type, node.arg_tys)) + 'E'
+        elif node.kind == 'array':
+            if node.dimension is None:
+                dimension = ''
+            elif node.dimension.kind == 'literal':
+                dimension = str(node.dimension.value)
+            else:
+                dimension = self.expression(node.dimension)
+            result = 'A' + dimension + '_' + self.type(node.ty)
+        elif node.kind in ('data', 'method'):
+            result = 'M' + self.type(node.cls_ty) + self.type(node.member_ty)
+        elif node.kind == 'decltype':
+            result = 'DT' + self.expression(node.value) + 'E'
+        elif node.kind == 'expand_arg_pack':
+            return 'Dp' + self.type(node.value)
+        elif node.kind == 'tpl_arg_pack':
+            return 'J' + ''.join(map(self.template_arg, node.value)) + 'E'
+        else:
+            raise ValueError("{} is not a type".format(node))
+        # like the parser, `std::` abbreviations are substitutions already, and are not
+        # candidates again
+        if result not in _std_names:
+            self._add_subst(node)
+        return result
+
+    def template_arg(self, node):
+        if node.kind == 'literal':
+            return self.expression(node)
+        elif node.kind == 'func' and node.name is not None:
+            # the parser reads an external name with a substitution table of its own
+            return 'L' + _Mangler().mangled_name(node) + 'E'
+        elif node.kind in ('func_param', 'unary', 'postfix', 'binary', 'ternary', 'member',
+                           'call', 'cast', 'conversion', 'keyword', 'sizeof_pack',
+                           'pack_expansion', 'new'):
+            return 'X' + self.expression(node) + 'E'
+        return self.type(node)
+
+    def expression(self, node):
+        if node.kind == 'literal':
+            return 'L' + self.type(node.ty) + str(node.value) + 'E'
+        elif node.kind == 'tpl_param':
+            return self.unqualified_name(node)
+        elif node.kind == 'name':
+            return _source_name(node.value)
+        elif node.kind == 'func_param':
+            return 'fp' + ('' if node.value == 1 else str(node.value - 2)) + '_'
+        elif node.kind == 'unary' and node.op in _unary_codes:
+            return _unary_codes[node.op] + self.expression(node.operands[0])
+        elif node.kind in ('binary', 'ternary') and node.op in _binary_codes:
+            return _binary_codes[node.op] + ''.join(map(self.expression, node.operands))
+        elif node.kind == 'call':
+            return 'cl' + ''.join(map(self.expression, node.operands)) + 'E'
+        elif node.kind == 'cast':
+            return _cast_codes[node.op] + self.type(node.operands[0]) + \
+                self.expression(node.operands[1])
+        elif node.kind == 'sizeof_pack':
+            return 'sZ' + self.expression(node.operands[0])
+        elif node.kind == 'pack_expansion':
+            return 'sp' + self.expression(node.operands[0])
+        elif node.kind == 'new':
+            placement, ty = node.operands[:2]
+            result = ('gs' if node.op.startswith('::') else '') + \
+                ('na' if node.op.endswith('[]') else 'nw') + \
+                ''.join(map(self.expression, placement.operands)) + '_' + self.type(ty)
+            if len(node.operands) == 2:
+                return result + 'E'
+            initializer = node.operands[2]
+            return result + ('pi' if initializer.op == '()' else 'il') + \
+                ''.join(map(self.expression, initializer.operands)) + 'E'
+        raise NotImplementedError("mangling {} expressions is not supported".format(node.kind))
+
+
+def mangle(ast):
+    """
+    Mangle `ast`, as returned by `parse` or `parse_demangled`, into a `str`.
+    """
+    return _Mangler().mangled_name(ast)
+
+
+# ================================================================================================
+
+
+_TOKEN_RE = re.compile(r"""
+\s* (?:
+    (?P<identifier>     [A-Za-z_][A-Za-z0-9_]*) |
+    (?P<number>         -?\d+) |
+    (?P<punctuation>    :: | \.\.\. | && | [<>(),*&~])
+)
+""", re.X)
+
+_OPERATOR_RE = re.compile(r"\s*(new\[\]|delete\[\]|new|delete|{})".format(
+    '|'.join(re.escape(op) for op in sorted(set(_operators.values()), key=len, reverse=True)
+             if not op[0].isalpha())))
+
+_builtin_words = ('void', 'wchar_t', 'bool', 'char', 'signed', 'unsigned', 'short', 'int',
+                  'long', 'float', 'double', '__int128', '__float80', '__float128', 'char16_t',
+                  'char32_t', 'auto', '_Float16', '_Decimal32', '_Decimal64', '_Decimal128')
+
+_builtin_names = {node.value: node for node in _builtin_types.values() if node.kind == 'builtin'}
+_builtin_names.update({
+    'long double': _builtin_types['e'],
+    'std::nullptr_t': _builtin_types['Dn'],
+})
+
+_cv_words = ('const', 'volatile', 'restrict')
+
+
+class _Tokens:
+    def __init__(self, text):
+        self._text = text
+        self._pos = 0
+
+    def error(self, message):
+        raise ValueError("{} at offset {} in {!r}".format(message, self._pos, self._text))
+
+    def _match(self):
+        match = _TOKEN_RE.match(self._text, self._pos)
+        if match is None and self._text[self._pos:].strip():
+            self.error("unexpected character")
+        return match
+
+    def peek(self):
+        match = self._match()
+        if match is None:
+            return None
+        return match.group(match.lastgroup)
+
+    def next(self):
+        match = self._match()
+        if match is None:
+            self.error("unexpected end of input")
+        self._pos = match.end()
+        return match.group(match.lastgroup)
+
+    def accept(self, token):
+        if self.peek() == token:
+            self.next()
+            return True
+        return False
+
+    def expect(self, token):
+        if not self.accept(token):
+            self.error("expected {!r}".format(token))
+
+    def operator(self):
+        match = _OPERATOR_RE.match(self._text, self._pos)
+        if match is None:
+            return None
+        self._pos = match.end()
+        return match.group(1)
+
+
+def _parse_builtin(tokens):
+    words = []
+    while tokens.peek() in _builtin_words:
+        words.append(tokens.next())
+    if not words:
+        return None
+    if 'unsigned' in words or 'signed' in words:
+        if len(words) == 1:
+            words.append('int')
+        if 'char' not in words:
+            words = [word for word in words if word != 'signed']
+    if 'int' in words and ('short' in words or 'long' in words):
+        words.remove('int')
+    name = ' '.join(words)
+    if name not in _builtin_names:
+        tokens.error("unknown type {!r}".format(name))
+    return _builtin_names[name]
+
+def _parse_literal(tokens, ty):
+    value = tokens.next()
+    if value in ('true', 'false'):
+        return CastNode('literal', '1' if value == 'true' else '0', Node('builtin', 'bool'))
+    elif value.lstrip('-').isdigit():
+        return CastNode('literal', value.replace('-', 'n'), ty)
+    tokens.error("expected a literal")
+
+def _parse_template_arg(tokens):
+    token = tokens.peek()
+    if token in ('true', 'false') or (token is not None and token.lstrip('-').isdigit()):
+        return _parse_literal(tokens, Node('builtin', 'int'))
+    elif tokens.accept('('):
+        ty = _parse_type(tokens)
+        tokens.expect(')')
+        return _parse_literal(tokens, ty)
+    return _parse_type(tokens)
+
+def _parse_unqualified_name(tokens, scope):
+    class_names = [part for part in scope if part.kind == 'name']
+    if tokens.accept('~'):
+        name = tokens.next()
+        if not class_names or class_names[-1].value != name:
+            tokens.error("destructor name does not match its class")
+        return Node('dtor', 'complete')
+    name = tokens.next()
+    if name == 'operator':
+        op = tokens.operator()
+        if op is not None:
+            return Node('oper', op)
+        return Node('oper_cast', _parse_type(tokens))
+    elif not (name[0].isalpha() or name[0] == '_'):
+        tokens.error("expected a name")
+    elif scope and scope[-1].kind == 'name' and scope[-1].value == name:
+        return Node('ctor', 'complete')
+    return Node('name', name)
+
+def _parse_name(tokens):
+    parts = []
+    while True:
+        parts.append(_parse_unqualified_name(tokens, parts))
+        if tokens.accept('<'):
+            args = []
+            while not tokens.accept('>'):
+                if args:
+                    tokens.expect(',')
+                args.append(_parse_template_arg(tokens))
+            parts.append(Node('tpl_args', tuple(args)))
+        if not tokens.accept('::'):
+            break
+    if len(parts) == 1:
+        return parts[0]
+    return Node('qual_name', tuple(parts))
+
+def _parse_cv(tokens, node):
+    qualifiers = set()
+    while tokens.peek() in _cv_words:
+        qualifiers.add(tokens.next())
+    if not qualifiers:
+        return node
+    if node.kind == 'cv_qual':
+        qualifiers |= node.qual
+        node = node.value
+    return QualNode('cv_qual', node, frozenset(qualifiers))
+
+def _parse_type(tokens):
+    qualifiers = set()
+    while tokens.peek() in _cv_words:
+        qualifiers.add(tokens.next())
+    node = _parse_builtin(tokens)
+    if node is None:
+        node = _parse_name(tokens)
+        node = _builtin_names.get(str(node), node)
+    if qualifiers:
+        node = QualNode('cv_qual', node, frozenset(qualifiers))
+    while True:
+        node = _parse_cv(tokens, node)
+        if tokens.accept('*'):
+            node = Node('pointer', node)
+        elif tokens.accept('&'):
+            node = Node('lvalue', node)
+        elif tokens.accept('&&'):
+            node = Node('rvalue', node)
+        else:
+            return node
+
+def _parse_arg_tys(tokens):
+    arg_tys = []
+    tokens.expect('(')
+    while not tokens.accept(')'):
+        if arg_tys:
+            tokens.expect(',')
+        if tokens.accept('...'):
+            arg_tys.append(Node('builtin', '...'))
+        else:
+            arg_tys.append(_parse_type(tokens))
+    if arg_tys == [Node('builtin', 'void')] or not arg_tys:
+        return (Node('builtin', 'void'),)
+    return tuple(arg_tys)
+
+def _parse_method_qualifiers(tokens, name):
+    name = _parse_cv(tokens, name)
+    if tokens.accept('&'):
+        name = Node('lvalue', name)
+    elif tokens.accept('&&'):
+        name = Node('rvalue', name)
+    return name
+
+def parse_demangled(text):
+    """
+    Parse a human-written declaration, such as `foo::bar(int, char const*) const` or
+    `void foo<int>(int)`, into an AST that can be passed to `mangle`. The return type is
+    only allowed, and required, for function templates. Constructors and destructors are
+    parsed as their complete object variants (`C1` and `D1`).
+
+    Only names and builtin, named, pointer, reference and cv-qualified types are supported.
+    Raises `ValueError` if `text` cannot be parsed.
+    """
+    tokens = _Tokens(text)
+    name = _parse_type(tokens)
+    ret_ty = None
+    if tokens.peek() not in (None, '('):
+        ret_ty, name = name, _parse_name(tokens)
+    if tokens.peek() is None and ret_ty is None:
+        return name
+
+    # our own rendering puts method qualifiers before the parameter list
+    name = _parse_method_qualifiers(tokens, name)
+    arg_tys = _parse_arg_tys(tokens)
+    name = _parse_method_qualifiers(tokens, name)
+    if tokens.peek() is not None:
+        tokens.error("unexpected {!r}".format(tokens.peek()))
+    if (ret_ty is not None) != _is_template(name):
+        tokens.error("return type must be given for, and only for, function templates")
+    return FuncNode('func', name, arg_tys, ret_ty)
+
+
+if __name__ == '__main__':
+    import sys
+    for line in (sys.argv[1:] or sys.stdin):
+        print(mangle(parse_demangled(line.strip())))
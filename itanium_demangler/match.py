@@ -0,0 +1,265 @@
+# encoding:utf-8
+"""
+Matching mangled symbols against demangled-style patterns.
+
+A pattern is a qualified name such as `std::vector<*>::push_back` or `absl::*::Hash*`.
+It is split into components at `::`, and matches a symbol whose entity has exactly as many
+name components, each matching the corresponding pattern component. Within a component,
+`*` matches any sequence of characters, including a literal `*`. A component that is just
+`**` matches any number of name components, including none.
+
+The function signature, return type and ABI tags of the entity are never matched. Template
+arguments are matched only if the pattern component has them, i.e. `std::vector::size`
+matches `std::vector<int, std::allocator<int>>::size() const`, and `std::vector<*>::size`
+does too, but `std::vector<char, *>::size` does not. Constructors and destructors are
+matched by their source names, e.g. `foo::Bar::Bar` or `foo::Bar::~Bar`. Special symbols,
+such as vtables or thunks, are matched by the name of the entity they refer to.
+
+`Matcher` avoids demangling most symbols. First, every identifier from the pattern has to
+occur in the mangled form as a `<length><identifier>` source name, or as a `std::`
+abbreviation. Second, the first identifier has to start the mangled name. Only then is the
+qualified name parsed, without the function signature, and matched. Symbols returned by
+`Matcher.search` are fully parsed.
+"""
+
+import re
+
+from . import parse, _Cursor, _parse_name, _expand_arg_packs, _std_names, _builtin_types
+
+
+# identifiers that may be mangled as a `std::` abbreviation or a builtin type instead of
+# a source name
+_std_abbreviations = {'std': ('St',)}
+for _abbreviation, _nodes in list(_std_names.items()) + [
+        (code, node.value) for code, node in _builtin_types.items()
+        if node.kind == 'qual_name']:
+    for _node in _nodes:
+        _std_abbreviations.setdefault(_node.value, ())
+        if _abbreviation not in _std_abbreviations[_node.value]:
+            _std_abbreviations[_node.value] += (_abbreviation,)
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+_PREFIX_RE = r"_?_ZZ*L?(?:N[rVK]*[RO]?)?"
+
+
+def _split_components(pattern):
+    components = []
+    depth = 0
+    start = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char in '<(':
+            depth += 1
+        elif char in '>)':
+            depth -= 1
+        elif depth == 0 and pattern.startswith('::', index):
+            components.append(pattern[start:index])
+            start = index + 2
+            index += 1
+        index += 1
+    components.append(pattern[start:])
+    return components
+
+def _translate(glob):
+    return re.compile(''.join('.*' if char == '*' else re.escape(char) for char in glob),
+                      re.S)
+
+def _normalize(pattern):
+    pattern = re.sub(r'\s*,\s*', ', ', pattern.strip())
+    return re.sub(r'>\s+(?=>)', '>', pattern)
+
+
+def _requirements(name):
+    """
+    Return a list of tuples of alternative substrings, one of which must occur in every
+    mangled symbol whose entity has a component matching the glob `name`.
+    """
+    if name.startswith('operator') or '{' in name:
+        return []
+    requirements = []
+    is_literal = _IDENTIFIER_RE.fullmatch(name.lstrip('~')) is not None
+    for identifier in _IDENTIFIER_RE.findall(name):
+        if any(identifier in std_name for std_name in _std_abbreviations):
+            if identifier in _std_abbreviations and is_literal:
+                requirements.append(('{}{}'.format(len(identifier), identifier),) +
+                                    _std_abbreviations[identifier])
+            continue
+        if is_literal:
+            requirements.append(('{}{}'.format(len(identifier), identifier),))
+        else:
+            requirements.append((identifier,))
+    return requirements
+
+def _prefix(name):
+    """
+    Return a regular expression matching the start of a mangled name whose first component
+    matches the glob `name`, or `None` if there isn't one.
+    """
+    if name.startswith('operator') or '{' in name or '~' in name:
+        return None
+    match = _IDENTIFIER_RE.match(name)
+    if match is None:
+        return None
+    identifier = match.group(0)
+    if identifier == 'std' and match.end() == len(name):
+        return re.compile(_PREFIX_RE + r"S[tabsiod]")
+    elif any(identifier in std_name for std_name in _std_abbreviations):
+        return None
+    elif match.end() == len(name):
+        return re.compile(_PREFIX_RE + str(len(identifier)) + re.escape(identifier))
+    else:
+        return re.compile(_PREFIX_RE + r"\d+" + re.escape(identifier))
+
+
+def _components(node):
+    """
+    Split a name node into a list of `(name, tpl_args)` pairs of strings, one per scope.
+    """
+    while node.kind in ('cv_qual', 'lvalue', 'rvalue'):
+        node = node.value
+    if node.kind == 'local_name':
+        func = node.func.name if node.func.kind == 'func' else node.func
+        return _components(func) + _components(node.entity)
+    elif node.kind == 'qual_name':
+        components = []
+        for part in node.value:
+            if part.kind == 'tpl_args':
+                if components:
+                    components[-1] = (components[-1][0], str(part))
+            elif part.kind == 'qual_name':
+                components += _components(part)
+            elif part.kind in ('ctor', 'dtor') and components:
+                name = str(components[-1][0])
+                components.append(('~' + name if part.kind == 'dtor' else name, ''))
+            else:
+                components += _components(part)
+        return components
+    elif node.kind == 'abi':
+        return _components(node.value)
+    elif node.kind == 'name':
+        return [(node.value, '')]
+    else:
+        return [(str(node), '')]
+
+def _entity(ast):
+    if ast.kind == 'func' and ast.name is not None:
+        return ast.name
+    elif ast.kind in ('vtable', 'vtt', 'typeinfo', 'typeinfo_name', 'nonvirt_thunk',
+                      'virt_thunk', 'covariant_thunk', 'guard_variable', 'extended_temporary',
+                      'transaction_clone'):
+        return _entity(ast.value)
+    return ast
+
+
+class Matcher:
+    """
+    A compiled pattern. See the module documentation for the pattern syntax.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self._components = []
+        self._requirements = []
+        self._prefix = None
+        for index, component in enumerate(_split_components(_normalize(pattern))):
+            if component == '**':
+                self._components.append(None)
+                continue
+            name, has_args, _ = component.partition('<')
+            self._components.append((_translate(component), bool(has_args)))
+            self._requirements += _requirements(name)
+            if index == 0:
+                self._prefix = _prefix(name)
+
+    def __repr__(self):
+        return "Matcher({!r})".format(self.pattern)
+
+    def _match_components(self, components, index=0, start=0):
+        if index == len(self._components):
+            return start == len(components)
+        pattern = self._components[index]
+        if pattern is None:
+            return any(self._match_components(components, index + 1, next_start)
+                       for next_start in range(start, len(components) + 1))
+        if start == len(components):
+            return False
+        regex, has_args = pattern
+        name, args = components[start]
+        if has_args:
+            match = regex.fullmatch(str(name) + args)
+        else:
+            match = regex.fullmatch(name)
+        if match is None:
+            return False
+        return self._match_components(components, index + 1, start + 1)
+
+    def match_ast(self, ast):
+        """
+        Return `True` if the entity of the parsed symbol `ast` matches.
+        """
+        return self._match_components(_components(_entity(ast)))
+
+    def match(self, symbol):
+        """
+        Return `True` if `symbol` matches. The signature is not parsed, so a symbol that
+        matches may still fail to parse as a whole.
+        """
+        for alternatives in self._requirements:
+            for alternative in alternatives:
+                if alternative in symbol:
+                    break
+            else:
+                return False
+
+        cursor = _Cursor(symbol)
+        if cursor.accept('_Z') or cursor.accept('__Z'):
+            special = cursor.peek('T') or cursor.peek('G')
+        else:
+            return False
+
+        try:
+            if special:
+                ast = parse(symbol)
+            else:
+                if self._prefix is not None and self._prefix.match(symbol) is None:
+                    return False
+                ast = _parse_name(cursor)
+                if ast is not None:
+                    ast = _expand_arg_packs(ast)
+        except NotImplementedError:
+            return False
+        if ast is None:
+            return False
+        return self.match_ast(ast)
+
+    def filter(self, symbols):
+        """
+        Return an iterator over the symbols of `symbols` that match.
+        """
+        return (symbol for symbol in symbols if self.match(symbol))
+
+    def search(self, symbols):
+        """
+        Return an iterator over `(symbol, ast)` pairs for the symbols of `symbols` that
+        match and parse.
+        """
+        for symbol in symbols:
+            if self.match(symbol):
+                try:
+                    ast = parse(symbol)
+                except NotImplementedError:
+                    continue
+                if ast is not None:
+                    yield symbol, ast
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 2:
+        print("Usage: python -m itanium_demangler.match PATTERN < symbols.txt", file=sys.stderr)
+        sys.exit(2)
+    matcher = Matcher(sys.argv[1])
+    for symbol in matcher.filter(line.strip() for line in sys.stdin):
+        print(symbol)
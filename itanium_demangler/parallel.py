@@ -0,0 +1,111 @@
+# encoding:utf-8
+"""
+Multi-threaded batch demangling.
+
+`BatchDemangler` demangles batches of symbols on a pool of threads. Each worker thread keeps
+its own `RenderCache` for its whole lifetime, so caches are never shared between threads.
+Compared with a process pool, threads avoid pickling the symbols and the results. On
+free-threaded builds of CPython (3.13t and later) the workers run in parallel; with the GIL
+they are serialized, and the batch API still works but does not scale.
+
+Running this module benchmarks the scaling with thread count:
+
+    python -m itanium_demangler.parallel symbols.txt --threads 1,2,4,8
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import demangle, RenderCache
+
+
+DEFAULT_CHUNK_SIZE = 1024
+
+_worker = threading.local()
+
+
+def _init_worker(cache_size):
+    _worker.cache = RenderCache(cache_size) if cache_size else None
+
+def _demangle_chunk(render, symbols):
+    if _worker.cache is None:
+        return [render(symbol) for symbol in symbols]
+    with _worker.cache:
+        return [render(symbol) for symbol in symbols]
+
+
+class BatchDemangler:
+    """
+    A pool of `workers` threads (by default, as many as `ThreadPoolExecutor` picks) that
+    demangle symbols with `render`, each with a render cache of `cache_size` entries, or
+    no cache if `cache_size` is 0.
+    """
+
+    def __init__(self, workers=None, cache_size=4096, render=demangle):
+        self.render = render
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='demangler',
+                                            initializer=_init_worker, initargs=(cache_size,))
+
+    def map(self, symbols, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Demangle `symbols` in chunks of `chunk_size` and return the results as a list,
+        in input order.
+        """
+        symbols = list(symbols)
+        futures = [self._executor.submit(_demangle_chunk, self.render,
+                                         symbols[start:start + chunk_size])
+                   for start in range(0, len(symbols), chunk_size)]
+        results = []
+        for future in futures:
+            results += future.result()
+        return results
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def demangle_batch(symbols, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, cache_size=4096,
+                   render=demangle):
+    """
+    Demangle `symbols` on a temporary `BatchDemangler` and return the results as a list.
+    """
+    with BatchDemangler(workers, cache_size, render) as demangler:
+        return demangler.map(symbols, chunk_size)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.parallel',
+        description='Benchmark multi-threaded demangling.')
+    parser.add_argument('corpus', help='file with one mangled symbol per line')
+    parser.add_argument('--threads', default='1,2,4,8',
+                        help='comma-separated thread counts (default: %(default)s)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--cache-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    symbols = [line.strip() for line in open(args.corpus) if line.strip()]
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print("{} symbols, GIL {}".format(len(symbols), 'enabled' if is_gil_enabled else 'disabled'))
+
+    baseline = None
+    for threads in map(int, args.threads.split(',')):
+        with BatchDemangler(threads, args.cache_size) as demangler:
+            start = time.perf_counter()
+            demangler.map(symbols, args.chunk_size)
+            elapsed = time.perf_counter() - start
+        rate = len(symbols) / elapsed
+        if baseline is None:
+            baseline = rate
+        print("{:>3} threads {:>12.0f} symbols/s {:>6.2f}x".format(threads, rate,
+                                                                   rate / baseline))
@@ -0,0 +1,177 @@
+# encoding:utf-8
+"""
+Symbolization of sampled addresses.
+
+`Symbolizer` maps addresses to the demangled names of the symbols containing them, given
+`(start, size, name)` ranges, such as the function symbols of an ELF file (`elf_ranges`) or
+the lines of a `perf` map file (`perf_map_ranges`). The ranges are kept sorted by start
+address in `array`s, so that a lookup is a single binary search, and a name is demangled
+only when an address in its range is first symbolized; the result is memoized, so later
+samples in the same function cost a binary search and a `dict` probe.
+
+Ranges are not expected to overlap. Of several ranges starting at the same address, such as
+aliases of one function, the first one added is kept; otherwise an address is attributed to
+the range with the closest start address below it, if the address is within it.
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from operator import itemgetter
+
+from . import demangle
+from .elf import ElfFile, SHN_UNDEF, STT_FUNC, STT_GNU_IFUNC
+
+
+Range = namedtuple('Range', 'start size name')
+
+
+class Symbolizer:
+    """
+    An index of address ranges. `style` is passed on to `demangle`.
+    """
+
+    def __init__(self, ranges=(), style=None):
+        self.style = style
+        self._pending = []
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._names = []
+        self._demangled = {}
+        self.update(ranges)
+
+    def __len__(self):
+        self._build()
+        return len(self._names)
+
+    def add(self, start, size, name):
+        self._pending.append((start, size, name))
+
+    def update(self, ranges):
+        """
+        Add every `(start, size, name)` tuple of `ranges`.
+        """
+        self._pending.extend(ranges)
+
+    def _build(self):
+        if not self._pending:
+            return
+        ranges = list(zip(self._starts, self._ends, self._names))
+        ranges += ((start, start + size, name) for start, size, name in self._pending)
+        ranges.sort(key=itemgetter(0))
+        self._pending = []
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._names = []
+        for start, end, name in ranges:
+            if self._names and self._starts[-1] == start:
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+            self._names.append(name)
+
+    def _find(self, address):
+        if self._pending:
+            self._build()
+        index = bisect_right(self._starts, address) - 1
+        if index < 0 or address >= self._ends[index]:
+            return None
+        return index
+
+    def lookup(self, address):
+        """
+        Return the `Range` containing `address`, with the name still mangled, or `None`.
+        """
+        index = self._find(address)
+        if index is None:
+            return None
+        start = self._starts[index]
+        return Range(start, self._ends[index] - start, self._names[index])
+
+    def _demangle(self, index):
+        name = self._names[index]
+        demangled = self._demangled.get(name)
+        if demangled is None:
+            demangled = self._demangled[name] = demangle(name, self.style)
+        return demangled
+
+    def symbolize(self, address):
+        """
+        Return the demangled name of the range containing `address`, or `None`.
+        """
+        index = self._find(address)
+        if index is None:
+            return None
+        return self._demangle(index)
+
+    def symbolize_offset(self, address):
+        """
+        Return a `(demangled_name, offset)` tuple for `address`, where `offset` is its
+        distance from the start of its range, or `None`.
+        """
+        index = self._find(address)
+        if index is None:
+            return None
+        return self._demangle(index), address - self._starts[index]
+
+
+def perf_map_ranges(lines):
+    """
+    Parse the lines of a `perf` map file, such as `/tmp/perf-<pid>.map`, each of which is
+    `START SIZE name` with hexadecimal `START` and `SIZE`, into `(start, size, name)` tuples.
+    """
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        start, size, name = line.split(' ', 2)
+        yield int(start, 16), int(size, 16), name
+
+
+def elf_ranges(elf):
+    """
+    Return an iterator over `(start, size, name)` tuples for the defined function symbols
+    of `elf`, an `ElfFile`. The start addresses are those of the file, before relocation.
+    """
+    for symbol in elf.symbols():
+        if symbol.type in (STT_FUNC, STT_GNU_IFUNC) and symbol.size and \
+                symbol.section_index != SHN_UNDEF:
+            yield symbol.value, symbol.size, symbol.name
+
+
+def load_perf_map(path, style=None):
+    with open(path) as f:
+        return Symbolizer(perf_map_ranges(f), style)
+
+
+def load_elf(path, style=None):
+    with ElfFile.open(path) as elf:
+        return Symbolizer(elf_ranges(elf), style)
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m itanium_demangler.symbolize',
+        description='Symbolize hexadecimal addresses read from standard input, one per line.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--perf-map', metavar='FILE', help='perf map file')
+    source.add_argument('--elf', metavar='FILE', help='ELF file with a symbol table')
+    parser.add_argument('--style', choices=('cxxfilt',), help='rendering style')
+    args = parser.parse_args()
+
+    if args.perf_map is not None:
+        symbolizer = load_perf_map(args.perf_map, args.style)
+    else:
+        symbolizer = load_elf(args.elf, args.style)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        result = symbolizer.symbolize_offset(int(line, 16))
+        if result is None:
+            print("{} ??".format(line))
+        else:
+            print("{} {}+{:#x}".format(line, *result))
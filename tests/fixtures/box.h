@@ -0,0 +1,8 @@
+namespace ns {
+template<typename T>
+struct Box {
+    T value;
+    T get() const { return value; }
+    void set(T v) { value = v; }
+};
+}
@@ -0,0 +1,6 @@
+#include "box.h"
+
+int first(ns::Box<int> &box) {
+    box.set(1);
+    return box.get();
+}
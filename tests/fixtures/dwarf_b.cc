@@ -0,0 +1,8 @@
+#include "box.h"
+
+namespace ns {
+long second(Box<long> &box, Box<int> &other) {
+    box.set(other.get());
+    return box.get();
+}
+}
@@ -1,6 +1,10 @@
 import unittest
 
-from itanium_demangler import parse, _operators, _builtin_types
+import threading
+
+from itanium_demangler import parse, _operators, _builtin_types, RenderCache, \
+    Node, FuncNode, LocalNode, Metrics, enable_metrics, disable_metrics, render, \
+    demangle, _Span
 
 
 class TestDemangler(unittest.TestCase):
@@ -95,8 +99,11 @@ class TestDemangler(unittest.TestCase):
     def test_argpack(self):
         self.assertDemangles('_Z1fILb0EJciEE', 'f<(bool)0, char, int>')
         self.assertDemangles('_Z1fILb0EIciEE', 'f<(bool)0, char, int>')
-        self.assertDemangles('_Z1fIJciEEvDpOT_', 'void f<char, int>(char, int)')
-        self.assertDemangles('_Z1fIIciEEvDpOT_', 'void f<char, int>(char, int)')
+        self.assertDemangles('_Z1fIJciEEvDpOT_', 'void f<char, int>(char&&, int&&)')
+        self.assertDemangles('_Z1fIIciEEvDpOT_', 'void f<char, int>(char&&, int&&)')
+        self.assertDemangles('_Z1fIJRicEEvDpOT_', 'void f<int&, char>(int&, char&&)')
+        self.assertDemangles('_Z1fIJciEEvDpRKT_', 'void f<char, int>(char const&, int const&)')
+        self.assertParses('_Z1fDpOT', None)
 
     def test_special(self):
         self.assertDemangles('_ZTV1f', 'vtable for f')
@@ -111,6 +118,9 @@ class TestDemangler(unittest.TestCase):
     def test_template_param(self):
         self.assertDemangles('_ZN1fIciEEvT_PT0_', 'void f<char, int>(char, int*)')
         self.assertParses('_ZN1fIciEEvT_PT0', None)
+        self.assertDemangles('_Z1fIiiiiiiiiiiicEvT10_',
+                             'void f<int, int, int, int, int, int, int, int, int, int, int, '
+                             'char>(char)')
 
     def test_substitution(self):
         self.assertDemangles('_Z3fooIEvS_', 'void foo<>(foo)')
@@ -131,9 +141,17 @@ class TestDemangler(unittest.TestCase):
         self.assertParses('_ZplIcET_S1_', None)
         # Operator template results don't get added to substitutions
         self.assertParses('_ZStplIcEvS0_', None)
+        # Neither do template-ids that are not types
+        self.assertDemangles('_ZSt4swapIiEvRT_S1_', 'void std::swap<int>(int&, int&)')
+        # Pointers to members do
+        self.assertDemangles('_Z1fM1aFvvES1_', 'f(void (a::*)(), void (a::*)())')
+        # `std::` abbreviations are never candidates
+        self.assertDemangles('_Z1fSsPcS_', 'f(std::string, char*, char*)')
 
     def test_abi_tag(self):
         self.assertDemangles('_Z3fooB5cxx11v', 'foo[abi:cxx11]()')
+        self.assertParses('_Z3fooB', None)
+        self.assertParses('_Z3fooB5c', None)
 
     def test_const(self):
         self.assertDemangles('_ZL3foo', 'foo')
@@ -151,6 +169,13 @@ class TestDemangler(unittest.TestCase):
         self.assertDemangles('_Z1fRA1_c', 'f(char(&)[(int)1])')
         self.assertDemangles('_Z1fIA1_cS0_E', 'f<char[(int)1], char[(int)1]>')
         self.assertParses('_Z1fA1c', None)
+        self.assertParses('_Z1fA_', None)
+        self.assertParses('_Z1fA1_', None)
+        self.assertDemangles('_Z1fRA_i', 'f(int(&)[])')
+        self.assertDemangles('_Z1fIiEvPAszT__i', 'void f<int>(int(*)[sizeof (int)])')
+        self.assertDemangles('_Z1fIiEvPAplLi1ELi2E_T_',
+                             'void f<int>(int(*)[((int)1)+((int)2)])')
+        self.assertParses('_Z1fIiEvPAplLi1E_i', None)
 
     def test_function(self):
         self.assertDemangles('_Z1fFvvE', 'f(void ())')
@@ -163,6 +188,8 @@ class TestDemangler(unittest.TestCase):
         self.assertDemangles('_Z1fM3fooi', 'f(int foo::*)')
         self.assertDemangles('_Z1fMN3foo3barEi', 'f(int foo::bar::*)')
         self.assertDemangles('_Z1fM3fooN3bar1XE', 'f(bar::X foo::*)')
+        self.assertParses('_Z1fM3foo', None)
+        self.assertParses('_Z1fM', None)
         self.assertDemangles('_Z1fM3fooIcE3bar', 'f(bar foo<char>::*)')
         self.assertDemangles('_Z1fM3foo3barIlE', 'f(bar<long> foo::*)')
         self.assertDemangles('_Z3fooPM2ABi', 'foo(int AB::**)')
@@ -171,3 +198,312 @@ class TestDemangler(unittest.TestCase):
         self.assertDemangles('_Z1fM3fooFvvE', 'f(void (foo::*)())')
         self.assertDemangles('_Z1fMN3foo3barEFvvE', 'f(void (foo::bar::*)())')
         self.assertDemangles('_Z3fooRM3barFviE', 'foo(void (bar::*&)(int))')
+
+    def test_local_name(self):
+        self.assertDemangles('_ZZ3foovE3bar', 'foo()::bar')
+        self.assertDemangles('_ZZ3foovE3barv', 'foo()::bar()')
+        self.assertDemangles('_ZZN1a1fEvE1x', 'a::f()::x')
+        self.assertDemangles('_ZZ1fIiEvvE1x', 'f<int>()::x')
+        self.assertDemangles('_ZZ3foovE3bar_0', 'foo()::bar')
+        self.assertDemangles('_ZZ3foovE3bar__12_', 'foo()::bar')
+        self.assertDemangles('_ZZ3foovEs', 'foo()::string literal')
+        self.assertDemangles('_ZZ3foovEs_0', 'foo()::string literal')
+        self.assertDemangles('_Z1fPZ1gvE1S', 'f(g()::S*)')
+        self.assertParses('_ZZ3foovE3bar_0', LocalNode(
+            'local_name', FuncNode('func', Node('name', 'foo'), (Node('builtin', 'void'),), None),
+            Node('name', 'bar'), 0))
+        self.assertParses('_ZZ3foov3bar', None)
+
+    def test_unnamed_type(self):
+        self.assertDemangles('_ZN1aUt_E', 'a::{unnamed type#1}')
+        self.assertDemangles('_ZN1aUt0_E', 'a::{unnamed type#2}')
+        self.assertParses('_ZN1aUt0E', None)
+
+    def test_closure_type(self):
+        self.assertDemangles('_ZN1aUlvE_clEv', 'a::{lambda()#1}::operator()()')
+        self.assertDemangles('_ZN1aUlvE0_clEv', 'a::{lambda()#2}::operator()()')
+        self.assertDemangles('_ZZ4mainENUliPcE0_clEiS0_',
+                             'main::{lambda(int, char*)#2}::operator()'
+                             '(int, {lambda(int, char*)#2})')
+        self.assertDemangles('_ZZ1fIiEvvEN1aUlT_E_clEi',
+                             'f<int>()::a::{lambda(int)#1}::operator()(int)')
+        self.assertParses('_ZN1aUlvEclEv', None)
+
+    def test_expression(self):
+        self.assertDemangles('_Z2f5ILi1EE1AIXplmlT_Li2ELi1EEES0_IXT_EE',
+                             'A<(((int)1)*((int)2))+((int)1)> f5<(int)1>(A<(int)1>)')
+        self.assertDemangles('_Z2f8IiE1AIXstT_EES1_', 'A<sizeof (int)> f8<int>(int)')
+        self.assertDemangles('_Z3f14IJiiEE1AIXsZT_EEDpT_', 'A<2> f14<int, int>(int, int)')
+        self.assertDemangles('_ZN4llvm10hash_valueIjEENSt9enable_ifIXsr19is_integral_or_enumIT_'
+                             'EE5valueENS_9hash_codeEE4typeES2_',
+                             'std::enable_if<is_integral_or_enum<unsigned int>::value, '
+                             'llvm::hash_code>::type llvm::hash_value<unsigned int>(unsigned int)')
+        self.assertParses('_Z1fIiE1AIXnwT_EE', None)
+        self.assertParses('_Z1fIiE1AIXplT_EE', None)
+        self.assertParses('_Z1fIiEDTsr1ABEv', None)
+        self.assertParses('_Z1fIiEDTsrN1AEv', None)
+        self.assertParses('_Z1fIiEDTsrNEv', None)
+        self.assertParses('_Z1fIiEDTsrEv', None)
+        self.assertEqual(demangle('_Z1fIiEDTsr1ABEv'), '_Z1fIiEDTsr1ABEv')
+
+    def test_decltype(self):
+        self.assertDemangles('_Z2f1IiEDTplfp_Li1EET_', 'decltype ({parm#1}+((int)1)) f1<int>(int)')
+        self.assertDemangles('_Z2f2IiEDTngfp_ET_', 'decltype (-{parm#1}) f2<int>(int)')
+        self.assertDemangles('_Z2f3I1SEDTcldtfp_3fooEET_', 'decltype (({parm#1}.foo)()) f3<S>(S)')
+        self.assertDemangles('_Z2f4I1SEDtptfp_3barEPT_', 'decltype ({parm#1}->bar) f4<S>(S*)')
+        self.assertDemangles('_Z2f6IiEDTsclfp_ET_',
+                             'decltype (static_cast<long>({parm#1})) f6<int>(int)')
+        self.assertDemangles('_Z2f7IiEDTcvlfp_ET_', 'decltype ((long){parm#1}) f7<int>(int)')
+        self.assertDemangles('_Z3f10IiEDTqufp_fp_fp_ET_',
+                             'decltype ({parm#1} ? {parm#1} : {parm#1}) f10<int>(int)')
+        self.assertDemangles('_Z3f12IiEDTppfp_ET_', 'decltype ({parm#1}++) f12<int>(int)')
+        self.assertDemangles('_Z3f13IiEDTpp_fp_ET_', 'decltype (++{parm#1}) f13<int>(int)')
+        self.assertDemangles('_Z1fIiEDTcl1gfp_fp0_EET_T_',
+                             'decltype (g({parm#1}, {parm#2})) f<int>(int, int)')
+        self.assertDemangles('_Z1fIiEDTcldtfp_dnT_EET_',
+                             'decltype (({parm#1}.~int)()) f<int>(int)')
+        self.assertDemangles('_Z1fIiEDTnw_T_EEv', 'decltype (new int) f<int>()')
+        self.assertDemangles('_Z1fIiEDTgsna_T_EEv', 'decltype (::new[] int) f<int>()')
+        self.assertDemangles('_Z1fIiEDTnw_T_piEEv', 'decltype (new int()) f<int>()')
+        self.assertDemangles('_Z1fIiEDTnwfp__T_pifp_EET_',
+                             'decltype (new ({parm#1}) int({parm#1})) f<int>(int)')
+        self.assertDemangles('_Z1fIiEDTnw_T_ilLi1ELi2EEEv',
+                             'decltype (new int{(int)1, (int)2}) f<int>()')
+        self.assertParses('_Z1fIiEDTnw_T_Ev', None)
+        self.assertParses('_Z1fIiEDTnw_T_piEv', None)
+        self.assertParses('_Z1fIiEDTnwfp_T_EEv', None)
+        self.assertParses('_Z1fIiEDTplfp_ET_', None)
+
+    def test_covariant_thunk(self):
+        self.assertDemangles('_ZTch0_v0_n32_N1C1cEv', 'covariant return thunk for C::c()')
+        self.assertDemangles('_ZTcv0_n24_v0_n32_N1C1cEv', 'covariant return thunk for C::c()')
+
+    def test_extended_temporary(self):
+        self.assertDemangles('_ZGR1r_', 'reference temporary #0 for r')
+        self.assertDemangles('_ZGR1r0_', 'reference temporary #1 for r')
+        self.assertDemangles('_ZGR1r', 'reference temporary #0 for r')
+
+    def test_reference_collapsing(self):
+        self.assertDemangles('_Z1fIRiEvOT_', 'void f<int&>(int&)')
+        self.assertDemangles('_Z1fIOiEvOT_', 'void f<int&&>(int&&)')
+        self.assertDemangles('_Z1fIOiEvRT_', 'void f<int&&>(int&)')
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_reuse(self):
+        ast = parse('_Z3fooISaIcEEvS0_')
+        expected = str(ast)
+        with RenderCache() as cache:
+            self.assertEqual(str(ast), expected)
+            self.assertEqual(str(ast), expected)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.hit_rate, 0.6)
+
+    def test_eviction(self):
+        with RenderCache(maxsize=1) as cache:
+            str(parse('_Z1fIcE'))
+            str(parse('_Z1fIiE'))
+            str(parse('_Z1fIcE'))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.evictions, 2)
+
+    def test_inactive(self):
+        cache = RenderCache()
+        with cache:
+            pass
+        str(parse('_Z1fIcE'))
+        self.assertEqual(cache.misses, 0)
+
+
+class TestRender(unittest.TestCase):
+    vector = '_ZNSt6vectorINS_IiSaIiEEESaIS1_EE9push_backERKS1_'
+
+    def test_unlimited(self):
+        ast = parse(self.vector)
+        self.assertEqual(render(ast), str(ast))
+        self.assertEqual(render(ast, max_length=len(str(ast))), str(ast))
+
+    def test_max_length(self):
+        ast = parse(self.vector)
+        self.assertEqual(render(ast, max_length=20), 'std::vector<std::...')
+        self.assertEqual(render(ast, max_length=20, ellipsis=u'\u2026'),
+                         u'std::vector<std::ve\u2026')
+        self.assertEqual(render(parse('_Z3foov'), max_length=5), 'foo()')
+        self.assertEqual(render(parse('_Z3foov'), max_length=4), 'f...')
+        self.assertEqual(render(parse('_Z3foov'), max_length=4, ellipsis=''), 'foo(')
+        with self.assertRaises(ValueError):
+            render(ast, max_length=2)
+
+    def test_max_template_depth(self):
+        ast = parse(self.vector)
+        self.assertEqual(render(ast, max_template_depth=0),
+                         'std::vector<...>::push_back(std::vector<...> const&)')
+        self.assertEqual(render(ast, max_template_depth=1),
+                         'std::vector<std::vector<...>, std::allocator<...>>::push_back('
+                         'std::vector<int, std::allocator<...>> const&)')
+        self.assertEqual(render(ast, max_length=30, max_template_depth=1),
+                         'std::vector<std::vector<......')
+
+    def test_cache(self):
+        ast = parse(self.vector)
+        with RenderCache() as cache:
+            render(ast, max_template_depth=0)
+            self.assertEqual(cache.hits + cache.misses, 0)
+            self.assertEqual(render(ast), str(ast))
+        self.assertEqual(len(cache), 4)
+
+
+class TestSpans(unittest.TestCase):
+    def test_parse(self):
+        for mangled in ['_ZN3foo3barIiEEvT_', '_ZN3foo3barIES_ES0_', '_ZNSt6vectorIiSaIiEE4sizeEv',
+                        '_ZZ1fvE1a', '_ZN12_GLOBAL__N_11aE', '_ZN1aB3cxxEv']:
+            ast = parse(mangled, spans=True)
+            self.assertEqual(ast, parse(mangled))
+            self.assertEqual(hash(ast), hash(parse(mangled)))
+            self.assertEqual(str(ast), str(parse(mangled)))
+            self.assertEqual(render(ast, style='cxxfilt'), render(parse(mangled), style='cxxfilt'))
+
+    def test_span(self):
+        name = parse('_ZN3foo6foobarE', spans=True).value[1].value
+        self.assertIsInstance(name, _Span)
+        self.assertEqual(name, 'foobar')
+        self.assertNotEqual(name, 'foo')
+        self.assertNotEqual(name, 'foobaz')
+        self.assertEqual(len(name), 6)
+        self.assertTrue(name.startswith('foo'))
+        self.assertFalse(name.startswith('foobarbaz'))
+        self.assertEqual('[{:>7}]'.format(name), '[ foobar]')
+        self.assertEqual(name, _Span('3foobar', 1, 7))
+        self.assertNotEqual(name, _Span('3foobaz', 1, 7))
+        self.assertEqual({name: 1}['foobar'], 1)
+
+
+class TestCxxfiltStyle(unittest.TestCase):
+    def assertDemangles(self, mangled, demangled):
+        self.assertEqual(demangle(mangled, style='cxxfilt'), demangled)
+
+    def test_ctor_dtor(self):
+        self.assertDemangles('_ZN1aIiEC1Ev', 'a<int>::a()')
+        self.assertDemangles('_ZN1aIiED2Ev', 'a<int>::~a()')
+        self.assertDemangles('_ZN1aC1IiEET_', 'a::a<int>(int)')
+
+    def test_std_names(self):
+        self.assertDemangles('_Z1fSs', 'f(std::basic_string<char, std::char_traits<char>, '
+                                       'std::allocator<char> >)')
+        self.assertDemangles('_ZNSiD0Ev', 'std::basic_istream<char, std::char_traits<char> >'
+                                          '::~basic_istream()')
+        self.assertDemangles('_ZNSaIcEC2Ev', 'std::allocator<char>::allocator()')
+        self.assertDemangles('_Z1fDn', 'f(decltype(nullptr))')
+
+    def test_builtin_types(self):
+        self.assertDemangles('_Z1fe', 'f(long double)')
+        self.assertDemangles('_Z1fx', 'f(long long)')
+
+    def test_literal(self):
+        self.assertDemangles('_Z1fILb1EEvv', 'void f<true>()')
+        self.assertDemangles('_Z1fILi5EEvv', 'void f<5>()')
+        self.assertDemangles('_Z1fILin5EEvv', 'void f<-5>()')
+        self.assertDemangles('_Z1fILm5EEvv', 'void f<5ul>()')
+        self.assertDemangles('_Z1fILc65EEvv', 'void f<(char)65>()')
+
+    def test_special(self):
+        self.assertDemangles('_ZTTSd', 'VTT for std::basic_iostream<char, '
+                                       'std::char_traits<char> >')
+        self.assertDemangles('_ZThn16_N1a1fEv', 'non-virtual thunk to a::f()')
+        self.assertDemangles('_ZTch0_h16_N1a1fEv', 'covariant return thunk to a::f()')
+
+    def test_qualifiers(self):
+        self.assertDemangles('_ZNK1a1fEv', 'a::f() const')
+        self.assertDemangles('_ZNKR1a1fEv', 'a::f() const &')
+        self.assertDemangles('_ZNO1a1fEv', 'a::f() &&')
+        self.assertDemangles('_ZZ1fvENKUlvE_clEv', 'f()::{lambda()#1}::operator()() const')
+        self.assertDemangles('_Z1fPVKi', 'f(int const volatile*)')
+
+    def test_function_and_array(self):
+        self.assertDemangles('_Z1fRKPFvvE', 'f(void (* const&)())')
+        self.assertDemangles('_Z1fPKFviE', 'f(void (*)(int) const)')
+        self.assertDemangles('_Z1fM1aKFivE', 'f(int (a::*)() const)')
+        self.assertDemangles('_Z1fRA5_Kc', 'f(char const (&) [5])')
+        self.assertDemangles('_Z1fRA_i', 'f(int (&) [])')
+        self.assertDemangles('_Z1fIiEvPAplLi1ELi2E_T_', 'void f<int>(int (*) [(1)+(2)])')
+
+    def test_names(self):
+        self.assertDemangles('_ZN12_GLOBAL__N_11aE', '(anonymous namespace)::a')
+        self.assertDemangles('_ZN1a1fIS_IiEEEvv', 'void a::f<a<int> >()')
+        self.assertDemangles('_ZlsI1aEvRS0_', 'void operator<< <a>(a&)')
+
+    def test_render(self):
+        ast = parse('_ZN1aC1Ev')
+        self.assertEqual(render(ast, style='cxxfilt'), 'a::a()')
+        self.assertEqual(str(ast), 'a::{ctor}()')
+        with self.assertRaises(ValueError):
+            render(ast, style='msvc')
+
+    def test_max_length(self):
+        for mangled in ('_ZN3fooB5cxx11C1Ev', '_ZN3fooB5cxx11D1Ev',
+                        '_ZN4llvm22getBitcodeTargetTripleB5cxx11ENS_15MemoryBufferRefE'):
+            ast = parse(mangled)
+            full = render(ast, style='cxxfilt')
+            for max_length in range(1, len(full) + 1):
+                self.assertEqual(render(ast, max_length=max_length, ellipsis='', style='cxxfilt'),
+                                 full[:max_length])
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = enable_metrics()
+
+    def tearDown(self):
+        disable_metrics()
+
+    def test_failures(self):
+        parse('_Z3foov')
+        parse('_Z3x')
+        parse('_Z3y')
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['symbols'], 3)
+        self.assertEqual(snapshot['failures'], {'unparsed': 2})
+
+    def test_latency(self):
+        parse('_Z3foov')
+        parse('_ZN' + '3foo' * 10 + 'Ev')
+        latency = self.metrics.snapshot()['latency']
+        self.assertEqual(len(latency), len(Metrics.LENGTH_BOUNDS) + 1)
+        self.assertEqual(latency[0]['max_length'], 32)
+        self.assertEqual(latency[-1]['max_length'], None)
+        self.assertEqual(sum(latency[0]['counts']), 1)
+        self.assertEqual(sum(latency[1]['counts']), 1)
+        self.assertEqual(len(latency[0]['counts']), len(Metrics.LATENCY_BOUNDS) + 1)
+
+    def test_cache(self):
+        ast = parse('_Z3fooISaIcEEvS0_')
+        with RenderCache():
+            str(ast)
+            str(ast)
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['cache_misses'], 2)
+        self.assertEqual(snapshot['cache_hits'], 3)
+        self.assertEqual(snapshot['cache_hit_rate'], 0.6)
+
+    def test_threads(self):
+        threads = [threading.Thread(target=lambda: [parse('_Z3foov') for _ in range(100)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.metrics.snapshot()['symbols'], 400)
+
+    def test_reset(self):
+        parse('_Z3x')
+        self.metrics.reset()
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['symbols'], 0)
+        self.assertEqual(snapshot['failures'], {})
+
+    def test_disabled(self):
+        self.assertIs(disable_metrics(), self.metrics)
+        parse('_Z3foov')
+        self.assertEqual(self.metrics.snapshot()['symbols'], 0)
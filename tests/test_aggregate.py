@@ -0,0 +1,40 @@
+import unittest
+
+from itanium_demangler import parse
+from itanium_demangler.aggregate import TemplateAggregator, template_key
+
+
+class TestTemplateAggregator(unittest.TestCase):
+    def assertKey(self, mangled, key):
+        self.assertEqual(template_key(parse(mangled)), key)
+
+    def test_key(self):
+        self.assertKey('_ZNSt6vectorIiSaIiEE17_M_realloc_insertIJRKiEEEvN9__gnu_cxx17__normal_'
+                       'iteratorIPiS1_EEDpOT_',
+                       'std::vector<...>::_M_realloc_insert<...>')
+        self.assertKey('_ZNKSt6vectorIcSaIcEE4sizeEv', 'std::vector<...>::size')
+        self.assertKey('_Z3fooIcEvT_', 'foo<...>')
+        self.assertKey('_Z3barv', 'bar')
+        self.assertKey('_ZTVN3foo3BarIiEE', 'vtable for foo::Bar<...>')
+
+    def test_sums(self):
+        aggregator = TemplateAggregator()
+        aggregator.feed([('_Z3fooIcEvT_', 10), ('_Z3fooIiEvT_', 20), ('_Z3barv', 5),
+                         ('bogus', 100)])
+        self.assertEqual(aggregator.failed, 1)
+        self.assertEqual(aggregator.total_size, 35)
+        self.assertEqual(aggregator.top(), [('foo<...>', 2, 30, 0), ('bar', 1, 5, 0)])
+
+    def test_bounded(self):
+        aggregator = TemplateAggregator(capacity=2)
+        for key, size in [('a', 10), ('b', 1), ('a', 10), ('c', 2), ('d', 1)]:
+            aggregator.add_key(key, size)
+        self.assertEqual(len(aggregator), 2)
+        # `b` is evicted by `c`, which is then evicted by `d`
+        self.assertEqual(aggregator.top(), [('a', 2, 20, 0), ('d', 3, 4, 3)])
+
+    def test_by_count(self):
+        aggregator = TemplateAggregator(by='count')
+        for key, size in [('a', 10), ('b', 1), ('b', 1)]:
+            aggregator.add_key(key, size)
+        self.assertEqual([entry.key for entry in aggregator.top(1)], ['b'])
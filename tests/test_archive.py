@@ -0,0 +1,62 @@
+import os
+import unittest
+
+from itanium_demangler import parse
+from itanium_demangler.archive import Archive, Member, parse_archives
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _member(name, data):
+    header = '{:<16}{:<12}{:<6}{:<6}{:<8}{:<10}`\n'.format(name, 0, 0, 0, 644, len(data))
+    return header.encode() + data + (b'\n' if len(data) % 2 else b'')
+
+
+class TestArchive(unittest.TestCase):
+    def test_members(self):
+        with Archive.open(os.path.join(FIXTURES, 'libbox.a')) as archive:
+            self.assertEqual([member.name for member in archive.members],
+                             ['dwarf_a.o', 'box_instantiations_b.o'])
+            self.assertEqual(archive.contents(archive.members[0])[:4], b'\x7fELF')
+
+    def test_long_names(self):
+        gnu = Archive(b'!<arch>\n' + _member('//', b'a_very_long_member_name.o/\n') +
+                      _member('/0', b'abc') + _member('b.o/', b'de'))
+        self.assertEqual(gnu.members, [Member('a_very_long_member_name.o', 156, 3),
+                                       Member('b.o', 220, 2)])
+        bsd = Archive(b'!<arch>\n' + _member('#1/20', b'a_very_long_name.o\0\0xyz'))
+        self.assertEqual(bsd.members, [Member('a_very_long_name.o', 88, 3)])
+        self.assertEqual(bsd.contents(bsd.members[0]), b'xyz')
+
+    def test_not_archive(self):
+        with self.assertRaises(ValueError):
+            Archive(b'\x7fELF')
+        with self.assertRaises(NotImplementedError):
+            Archive(b'!<thin>\n')
+
+    def test_parse_archives(self):
+        path = os.path.join(FIXTURES, 'libbox.a')
+        for workers in (1, 4):
+            names = [(name, str(ast)) for name, ast in parse_archives([path], workers)]
+            self.assertEqual(len(names), len(set(names)))
+            self.assertEqual(sorted(names), [
+                ('_Z5firstRN2ns3BoxIiEE', 'first(ns::Box<int>&)'),
+                ('_ZN2ns3BoxIiE3setEi', 'ns::Box<int>::set(int)'),
+                ('_ZN2ns3BoxIlE3setEl', 'ns::Box<long>::set(long)'),
+                ('_ZN2ns6secondERNS_3BoxIlEERNS0_IiEE',
+                 'ns::second(ns::Box<long>&, ns::Box<int>&)'),
+                ('_ZNK2ns3BoxIiE3getEv', str(parse('_ZNK2ns3BoxIiE3getEv'))),
+                ('_ZNK2ns3BoxIlE3getEv', str(parse('_ZNK2ns3BoxIlE3getEv'))),
+            ])
+
+    def test_seen(self):
+        seen = {'_Z5firstRN2ns3BoxIiEE'}
+        names = [name for name, _ in parse_archives([os.path.join(FIXTURES, 'libbox.a')],
+                                                    seen=seen)]
+        self.assertNotIn('_Z5firstRN2ns3BoxIiEE', names)
+        self.assertIn('_ZN2ns3BoxIlE3setEl', seen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from itanium_demangler import demangle
+from itanium_demangler.bulk import bulk_demangle
+
+
+class Interrupted(Exception):
+    pass
+
+
+class TestBulk(unittest.TestCase):
+    symbols = ['_Z3foov', 'main', '_ZN1a1bEi', '', '_ZN3foo3barIiEEvT_'] * 20
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, 'symbols.txt')
+        self.output = os.path.join(self.directory, 'demangled.txt')
+        with open(self.input, 'w') as f:
+            f.writelines(symbol + '\n' for symbol in self.symbols)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_output(self):
+        with open(self.output) as f:
+            return f.read().split('\n')[:-1]
+
+    def test_bulk(self):
+        self.assertEqual(bulk_demangle(self.input, self.output, chunk_size=37), len(self.symbols))
+        self.assertEqual(self.read_output(), [demangle(symbol) for symbol in self.symbols])
+        self.assertFalse(os.path.exists(self.output + '.checkpoint'))
+
+    def interrupt_after(self, count):
+        calls = []
+        def render(symbol):
+            calls.append(symbol)
+            if len(calls) == count:
+                raise Interrupted
+            return demangle(symbol)
+        with self.assertRaises(Interrupted):
+            bulk_demangle(self.input, self.output, chunk_size=64, render=render)
+        self.assertTrue(os.path.exists(self.output + '.checkpoint'))
+
+    def test_resume(self):
+        self.interrupt_after(50)
+        # simulate a partial write of the interrupted chunk
+        with open(self.output, 'a') as f:
+            f.write('garbage')
+
+        lines = bulk_demangle(self.input, self.output, chunk_size=64)
+        self.assertGreater(lines, 0)
+        self.assertLess(lines, len(self.symbols) - 40)
+        self.assertEqual(self.read_output(), [demangle(symbol) for symbol in self.symbols])
+
+    def test_changed_input(self):
+        self.interrupt_after(50)
+        with open(self.input, 'a') as f:
+            f.write('_Z3bazv\n')
+        with self.assertRaises(ValueError):
+            bulk_demangle(self.input, self.output)
+
+    def test_changed_output(self):
+        self.interrupt_after(50)
+        other = os.path.join(self.directory, 'other.txt')
+        shutil.copy(self.output, other)
+        with self.assertRaises(ValueError):
+            bulk_demangle(self.input, other, checkpoint_path=self.output + '.checkpoint')
+
+    def test_empty(self):
+        open(self.input, 'w').close()
+        self.assertEqual(bulk_demangle(self.input, self.output), 0)
+        self.assertEqual(self.read_output(), [])
@@ -0,0 +1,44 @@
+import unittest
+
+from itanium_demangler.columnar import demangle_columns, KINDS
+
+
+class TestColumnar(unittest.TestCase):
+    def assertRow(self, columns, index, kind, namespace, cls, name, tpl_args, arity):
+        self.assertEqual(KINDS[columns.kind[index]], kind)
+        self.assertEqual(columns.namespace[index], namespace)
+        self.assertEqual(columns.cls[index], cls)
+        self.assertEqual(columns.name[index], name)
+        self.assertEqual(columns.tpl_args[index], tpl_args)
+        self.assertEqual(columns.arity[index], arity)
+
+    def test_rows(self):
+        columns = demangle_columns([
+            '_ZNSt6vectorIiSaIiEE9push_backERKi',
+            '_ZN2ns3fooIcEEvT_',
+            '_ZNK3foo3bazEic',
+            '_ZN3foo1xE',
+            '_Z3barv',
+            'bogus',
+        ])
+        self.assertEqual(len(columns), 6)
+        self.assertRow(columns, 0, 'func', 'std', 'vector<int, std::allocator<int>>',
+                       'push_back', '', 1)
+        self.assertRow(columns, 1, 'func', '', 'ns', 'foo', '<char>', 1)
+        self.assertRow(columns, 2, 'func', '', 'foo', 'baz', '', 2)
+        self.assertRow(columns, 3, 'data', '', 'foo', 'x', '', -1)
+        self.assertRow(columns, 4, 'func', '', '', 'bar', '', 0)
+        self.assertRow(columns, 5, 'error', '', '', '', '', -1)
+
+    def test_special(self):
+        columns = demangle_columns(['_ZTVN3foo3BarIiEE', '_ZTIPi', '_ZThn16_N1a1fEv'])
+        self.assertRow(columns, 0, 'vtable', 'foo', 'Bar<int>', '', '', -1)
+        self.assertRow(columns, 1, 'typeinfo', '', 'int*', '', '', -1)
+        self.assertRow(columns, 2, 'nonvirt_thunk', '', 'a', 'f', '', 0)
+
+    def test_buffers(self):
+        columns = demangle_columns(['_ZN1a1fEv', '_ZN2bc1gEv'])
+        offsets, data = columns.buffers()['cls']
+        self.assertEqual(list(offsets), [0, 1, 3])
+        self.assertEqual(bytes(data), b'abc')
+        self.assertEqual(list(columns.buffers()['arity']), [0, 0])
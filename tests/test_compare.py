@@ -0,0 +1,42 @@
+import shutil
+import unittest
+
+from itanium_demangler import parse
+from itanium_demangler.compare import compare, culprit, demangle, group_mismatches, \
+    normalize_loose, reference_demangle
+
+
+class TestCompare(unittest.TestCase):
+    def test_demangle(self):
+        self.assertEqual(demangle('_Z3foov'), 'foo()')
+        self.assertEqual(demangle('main'), 'main')
+
+    def test_normalize_loose(self):
+        self.assertEqual(normalize_loose('a<b<c<int> > >'), 'a<b<c<int>>>')
+        self.assertEqual(normalize_loose('operator> >(a)'), 'operator>>(a)')
+
+    def test_culprit(self):
+        ast = parse('_ZN1aC1ERKi')
+        self.assertEqual(culprit(ast, 'a::{ctor}(int const&)'), None)
+        self.assertEqual(culprit(ast, 'a::a(int const&)').kind, 'ctor')
+
+    def test_compare(self):
+        symbols = ['_Z3foov', '_ZN1aC1Ev', '_ZTT1a', 'bogus', '_ZN1a1fIS_IiEEEvv']
+        expected = ['foo()', 'a::a()', 'VTT for a', 'bogus', 'void a::f<a<int> >()']
+        mismatches = compare(symbols, expected)
+        self.assertEqual([(m.symbol, m.production) for m in mismatches],
+                         [('_ZN1aC1Ev', 'ctor'), ('_ZTT1a', 'vtt'),
+                          ('_ZN1a1fIS_IiEEEvv', 'tpl_args')])
+        self.assertEqual(len(compare(symbols, expected, normalize=normalize_loose)), 2)
+        self.assertEqual(compare(['_Z3x'], ['_Z3y'])[0].production, 'unparsed')
+
+    def test_group_mismatches(self):
+        mismatches = compare(['_ZN1aC1Ev', '_ZN1aD1Ev', '_ZN1bC2Ev'],
+                             ['a::a()', 'a::~a()', 'b::b()'])
+        groups = group_mismatches(mismatches)
+        self.assertEqual([(production, len(group)) for production, group in groups.items()],
+                         [('ctor', 2), ('dtor', 1)])
+
+    @unittest.skipUnless(shutil.which('c++filt'), 'c++filt not available')
+    def test_reference_demangle(self):
+        self.assertEqual(reference_demangle(['_Z3foov', 'bogus']), ['foo()', 'bogus'])
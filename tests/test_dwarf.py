@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from itanium_demangler.elf import ElfFile
+from itanium_demangler.dwarf import linkage_names, parse_linkage_names
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+DWARF_A_NAMES = [
+    '_ZNK2ns3BoxIiE3getEv',
+    '_ZN2ns3BoxIiE3setEi',
+    '_Z5firstRN2ns3BoxIiEE',
+]
+DWARF_B_NAMES = [
+    '_ZNK2ns3BoxIlE3getEv',
+    '_ZN2ns3BoxIlE3setEl',
+    '_ZNK2ns3BoxIiE3getEv',
+    '_ZN2ns3BoxIiE3setEi',
+    '_ZN2ns6secondERNS_3BoxIlEERNS0_IiEE',
+]
+
+
+class TestLinkageNames(unittest.TestCase):
+    def linkage_names(self, fixture):
+        with ElfFile.open(os.path.join(FIXTURES, fixture)) as elf:
+            return list(linkage_names(elf))
+
+    def test_dwarf4(self):
+        # Box<int> methods are described in both units, and yielded once
+        self.assertEqual(self.linkage_names('dwarf4.so'),
+                         DWARF_A_NAMES + ['_ZNK2ns3BoxIlE3getEv', '_ZN2ns3BoxIlE3setEl',
+                                          '_ZN2ns6secondERNS_3BoxIlEERNS0_IiEE'])
+
+    def test_dwarf5_compressed(self):
+        self.assertEqual(self.linkage_names('dwarf5z.so'), self.linkage_names('dwarf4.so'))
+
+    def test_relocatable(self):
+        self.assertEqual(self.linkage_names('dwarf_b.o'), DWARF_B_NAMES)
+
+    def test_split(self):
+        # split units refer to strings by index into .debug_str_offsets.dwo
+        self.assertEqual(self.linkage_names('dwarf_b.dwo'), DWARF_B_NAMES)
+
+    def test_no_debug_info(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf4.so')) as elf:
+            elf.sections = [section for section in elf.sections
+                            if not section.name.startswith('.debug_info')]
+            self.assertEqual(list(linkage_names(elf)), [])
+
+    def test_parse(self):
+        names = list(parse_linkage_names([os.path.join(FIXTURES, 'dwarf_b.o'),
+                                          os.path.join(FIXTURES, 'dwarf4.so')]))
+        self.assertEqual([name for name, _ in names],
+                         DWARF_B_NAMES + ['_Z5firstRN2ns3BoxIiEE'])
+        self.assertEqual(str(names[-1][1]), 'first(ns::Box<int>&)')
+
+
+if __name__ == '__main__':
+    unittest.main()
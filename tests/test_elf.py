@@ -0,0 +1,48 @@
+import os
+import unittest
+
+from itanium_demangler.elf import ElfFile, ET_REL, SHF_COMPRESSED, STT_FUNC
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class TestElfFile(unittest.TestCase):
+    def test_sections(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf4.so')) as elf:
+            self.assertTrue(elf.is_64bit)
+            self.assertEqual(elf.byte_order, '<')
+            section = elf.section('.debug_str')
+            self.assertEqual(section.name, '.debug_str')
+            data, start, end = elf.contents(section)
+            self.assertIs(data, elf.data)
+            self.assertIn(b'_ZN2ns3BoxIiE3setEi', data[start:end])
+            self.assertIsNone(elf.section('.nonexistent'))
+
+    def test_compressed(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf5z.so')) as elf:
+            section = elf.section('.debug_str')
+            self.assertTrue(section.flags & SHF_COMPRESSED)
+            data, start, end = elf.contents(section)
+            self.assertIn(b'_ZN2ns3BoxIiE3setEi', data[start:end])
+
+    def test_relocations(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf_b.o')) as elf:
+            self.assertEqual(elf.type, ET_REL)
+            self.assertTrue(elf.relocations(elf.section('.debug_info')))
+
+    def test_symbols(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf4.so')) as elf:
+            symbols = {symbol.name: symbol for symbol in elf.symbols()}
+        symbol = symbols['_Z5firstRN2ns3BoxIiEE']
+        self.assertEqual((symbol.type, symbol.bind), (STT_FUNC, 1))
+        self.assertGreater(symbol.size, 0)
+        self.assertNotEqual(symbol.value, 0)
+
+    def test_not_elf(self):
+        with self.assertRaises(ValueError):
+            ElfFile(b'!<arch>\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
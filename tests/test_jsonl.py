@@ -0,0 +1,48 @@
+import io
+import json
+import unittest
+
+from itanium_demangler import parse
+from itanium_demangler.jsonl import encode_ast, encode_symbol, write_jsonl
+
+
+class TestJsonl(unittest.TestCase):
+    def test_encode_ast(self):
+        self.assertEqual(encode_ast(parse('_Z3fooPKc')),
+                         '{"kind":"func","name":{"kind":"name","value":"foo"},'
+                         '"arg_tys":[{"kind":"pointer","value":{"kind":"cv_qual",'
+                         '"value":{"kind":"builtin","value":"char"},"qual":["const"]}}],'
+                         '"ret_ty":null}')
+        self.assertEqual(encode_ast(None), 'null')
+
+    def test_schema(self):
+        for mangled in ['_ZN1aB3cxxB3abiEv', '_ZZ3foovE1x', '_ZNKSt6vectorIiSaIiEE4sizeEv',
+                        '_Z1fIiEvPA10_T_', '_ZTv0_n24_N1a1fEv', '_ZZ1fvENKUlvE_clEv',
+                        '_Z1fIiEDTplfp_Li1EET_', '_ZGR1r_']:
+            encoded = json.loads(encode_ast(parse(mangled)))
+            self.assertIn('kind', encoded)
+        self.assertEqual(json.loads(encode_ast(parse('_Z1fv'))),
+                         {'kind': 'func', 'name': {'kind': 'name', 'value': 'f'},
+                          'arg_tys': [{'kind': 'builtin', 'value': 'void'}], 'ret_ty': None})
+        encoded = json.loads(encode_ast(parse('_ZN1aB3cxxB3abiEv')))
+        self.assertEqual(encoded['name']['value'][0]['qual'], ['abi', 'cxx'])
+
+    def test_spans(self):
+        self.assertEqual(encode_ast(parse('_ZN1a1fEv', spans=True)),
+                         encode_ast(parse('_ZN1a1fEv')))
+
+    def test_encode_symbol(self):
+        self.assertEqual(json.loads(encode_symbol('_Z1fv'))['demangled'], 'f()')
+        self.assertEqual(json.loads(encode_symbol('main')),
+                         {'symbol': 'main', 'demangled': 'main', 'ast': None})
+        self.assertEqual(json.loads(encode_symbol('main', demangled=False)),
+                         {'symbol': 'main', 'ast': None})
+        self.assertTrue(encode_symbol('_Z1fv').endswith('}\n'))
+
+    def test_write_jsonl(self):
+        output = io.StringIO()
+        symbols = ['_Z1fv', 'main', '_Z3fooé'] * 3
+        self.assertEqual(write_jsonl(symbols, output, batch_size=2), len(symbols))
+        lines = output.getvalue().split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertEqual([json.loads(line)['symbol'] for line in lines[:-1]], symbols)
@@ -0,0 +1,58 @@
+import os
+import unittest
+
+from itanium_demangler.linkmap import MapSymbol, read_linker_map, parse_linker_map
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class TestLinkMap(unittest.TestCase):
+    def test_read(self):
+        with open(os.path.join(FIXTURES, 'box.map')) as f:
+            symbols = list(read_linker_map(f))
+        symbols = {symbol.name: symbol for symbol in symbols}
+        self.assertEqual(symbols['_Z5firstRN2ns3BoxIiEE'],
+                         MapSymbol('_Z5firstRN2ns3BoxIiEE',
+                                   symbols['_Z5firstRN2ns3BoxIiEE'].address,
+                                   '.text._Z5firstRN2ns3BoxIiEE', 'dwarf_a.o'))
+        self.assertEqual(symbols['_ZNSaIcED2Ev@@GLIBCXX_3.4'],
+                         MapSymbol('_ZNSaIcED2Ev@@GLIBCXX_3.4', 0x1010, '.plt', 'dwarf_a.o'))
+        self.assertEqual(symbols['_ZN2ns3BoxIlE3setEl'].file,
+                         'libbox.a(box_instantiations_b.o)')
+        self.assertIn('_DYNAMIC', symbols)
+        for name in symbols:
+            self.assertNotIn('=', name)
+            self.assertFalse(name.startswith(('0x', '(')))
+
+    def test_lines(self):
+        lines = [
+            'Linker script and memory map\n',
+            '                0x0000000000001000                . = ALIGN (0x1000)\n',
+            '.text           0x0000000000001000       0x20\n',
+            ' .text._ZN1a1fEv\n',
+            '                0x0000000000001000       0x10 a.o\n',
+            '                0x0000000000001000                _ZN1a1fEv\n',
+            ' .text          0x0000000000001010       0x10 b.o\n',
+            '                0x0000000000001010                f()\n',
+            '                [!provide]                        PROVIDE (etext = .)\n',
+        ]
+        self.assertEqual(list(read_linker_map(lines)), [
+            MapSymbol('_ZN1a1fEv', 0x1000, '.text._ZN1a1fEv', 'a.o'),
+            MapSymbol('f()', 0x1010, '.text', 'b.o'),
+        ])
+
+    def test_parse(self):
+        names = dict(parse_linker_map(os.path.join(FIXTURES, 'box.map')))
+        self.assertEqual(str(names['_ZN2ns6secondERNS_3BoxIlEERNS0_IiEE']),
+                         'ns::second(ns::Box<long>&, ns::Box<int>&)')
+        self.assertIsNone(names['_DYNAMIC'])
+        self.assertEqual(str(names['_ZNSaIcED2Ev@@GLIBCXX_3.4']),
+                         'std::allocator<char>::{base dtor}()')
+        self.assertEqual(str(names['_ZNSt8ios_base4InitC1Ev@GLIBCXX_3.4']),
+                         'std::ios_base::Init::{ctor}()')
+        self.assertIsNone(names['strlen@@GLIBC_2.2.5'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+from itanium_demangler import parse
+from itanium_demangler.mangle import mangle, parse_demangled
+
+
+class TestMangler(unittest.TestCase):
+    def assertRoundTrips(self, mangled):
+        self.assertEqual(mangle(parse(mangled)), mangled)
+
+    def assertMangles(self, demangled, mangled):
+        self.assertEqual(mangle(parse_demangled(demangled)), mangled)
+
+    def test_name(self):
+        self.assertRoundTrips('_Z3foov')
+        self.assertRoundTrips('_ZN3foo3barEiPKc')
+        self.assertRoundTrips('_ZN3foo3barC1Ev')
+        self.assertRoundTrips('_ZN3foo3barD2Ev')
+        self.assertRoundTrips('_ZNK3foo3barEv')
+        self.assertRoundTrips('_ZNKR3foo3barEv')
+        self.assertRoundTrips('_Z3fooB5cxx11v')
+
+    def test_std(self):
+        self.assertRoundTrips('_ZNSt6vectorIiSaIiEE9push_backERKi')
+        self.assertRoundTrips('_ZNKSt7__cxx1112basic_stringIcSt11char_traitsIcESaIcEE4sizeEv')
+        self.assertRoundTrips('_ZSt4swapIiEvRT_S1_')
+        self.assertRoundTrips('_ZNSsC1EPKcRKSaIcE')
+
+    def test_substitution(self):
+        self.assertRoundTrips('_ZN2n11fEPNS_1bEPNS_2n21cEPNS2_2n31dE')
+        self.assertRoundTrips('_Z1fM1aFvvES1_')
+        self.assertRoundTrips('_Z1fPFviEPKS_')
+        # `std::` abbreviations are not substitution candidates
+        self.assertRoundTrips('_ZNKSt4hashISsEclESs')
+        self.assertRoundTrips('_ZNSirsEPFRSiS_E')
+        self.assertRoundTrips('_ZNSolsEPFRSoS_E')
+        self.assertRoundTrips('_Z1fSsPcS_')
+
+    def test_spans(self):
+        self.assertEqual(mangle(parse('_ZN3foo3barIiEEvT_', spans=True)), '_ZN3foo3barIiEEvT_')
+
+    def test_template(self):
+        self.assertRoundTrips('_Z3fooIiEvT_')
+        self.assertRoundTrips('_Z1fIciEvT_PT0_')
+        self.assertRoundTrips('_Z1fIiiiiiiiiiiicEvT10_')
+        self.assertRoundTrips('_Z1fILi1ELb0EEvv')
+        self.assertRoundTrips('_ZplIcET_S0_')
+
+    def test_array(self):
+        self.assertRoundTrips('_Z1fRA5_i')
+        self.assertRoundTrips('_Z1fRA_i')
+        self.assertRoundTrips('_Z1fIiEvPAplLi1ELi2E_T_')
+
+    def test_local_name(self):
+        self.assertRoundTrips('_ZZ3foovE3bar')
+        self.assertRoundTrips('_ZZ3foovE3bar_0')
+        self.assertRoundTrips('_ZZN3foo3barEvENKUlvE_clEv')
+
+    def test_operator(self):
+        self.assertRoundTrips('_ZN3fooplERKS_')
+        self.assertRoundTrips('_ZN3fooppEv')
+        self.assertRoundTrips('_ZN3foongEv')
+        self.assertRoundTrips('_ZN3foocvbEv')
+
+    def test_special(self):
+        self.assertRoundTrips('_ZTV3foo')
+        self.assertRoundTrips('_ZTIN3foo3barE')
+        self.assertRoundTrips('_ZTSN3foo3barE')
+        self.assertRoundTrips('_ZGVZ3foovE3bar')
+        self.assertRoundTrips('_ZGR3foo_')
+        self.assertRoundTrips('_ZGR3foo0_')
+        with self.assertRaises(NotImplementedError):
+            mangle(parse('_ZThn16_1fv'))
+
+    def test_expression(self):
+        self.assertRoundTrips('_Z1fIiEDTnw_T_EEv')
+        self.assertRoundTrips('_Z1fIiEDTgsna_T_EEv')
+        self.assertRoundTrips('_Z1fIiEDTnwfp__T_piLi1ELi2EEEv')
+        self.assertRoundTrips('_Z1fIiEDTnw_T_ilLi1EEEv')
+
+    def test_canonical(self):
+        # argument packs are flattened by the parser
+        self.assertEqual(mangle(parse('_Z1fIJciEEvDpT_')), '_Z1fIciEvT_T0_')
+        self.assertEqual(mangle(parse('_Z1fIJciEEvDpOT_')), '_Z1fIciEvOT_OT0_')
+        # and so are types equal to template arguments
+        self.assertEqual(mangle(parse('_Z3fooISaIcEEvS0_')), '_Z3fooISaIcEEvT_')
+
+    def test_parse_demangled(self):
+        self.assertMangles('foo', '_Z3foo')
+        self.assertMangles('foo()', '_Z3foov')
+        self.assertMangles('foo::bar(int, char const*)', '_ZN3foo3barEiPKc')
+        self.assertMangles('foo::bar(int, const char *)', '_ZN3foo3barEiPKc')
+        self.assertMangles('foo::bar() const', '_ZNK3foo3barEv')
+        self.assertMangles('foo::bar(foo::bar&&) &', '_ZNR3foo3barEONS_3barE')
+        self.assertMangles('void foo<int>(int)', '_Z3fooIiEvT_')
+        self.assertMangles('std::vector<int, std::allocator<int> >::size() const',
+                           '_ZNKSt6vectorIiSaIiEE4sizeEv')
+        self.assertMangles('foo::foo(unsigned long long)', '_ZN3fooC1Ey')
+        self.assertMangles('foo::~foo()', '_ZN3fooD1Ev')
+        self.assertMangles('foo::operator+=(foo const&)', '_ZN3foopLERKS_')
+
+    def test_parse_demangled_error(self):
+        with self.assertRaises(ValueError):
+            parse_demangled('foo(int')
+        with self.assertRaises(ValueError):
+            parse_demangled('int foo(int)')
+        with self.assertRaises(ValueError):
+            parse_demangled('foo<int>(int)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from itanium_demangler.match import Matcher
+
+
+class TestMatcher(unittest.TestCase):
+    def assertMatches(self, pattern, symbol):
+        self.assertTrue(Matcher(pattern).match(symbol), (pattern, symbol))
+
+    def assertNotMatches(self, pattern, symbol):
+        self.assertFalse(Matcher(pattern).match(symbol), (pattern, symbol))
+
+    def test_literal(self):
+        self.assertMatches('foo::bar', '_ZN3foo3barEv')
+        self.assertMatches('foo::bar', '_ZNK3foo3barERKi')
+        self.assertMatches('bar', '_Z3barv')
+        self.assertNotMatches('foo', '_ZN3foo3barEv')
+        self.assertNotMatches('foo::bar::baz', '_ZN3foo3barEv')
+        self.assertNotMatches('bar', '_ZN3foo3barEv')
+        self.assertNotMatches('foo::bar', 'foo::bar')
+
+    def test_wildcard(self):
+        self.assertMatches('absl::*::Hash*', '_ZN4absl13hash_internal8HashImplEv')
+        self.assertMatches('*::bar', '_ZN3foo3barEv')
+        self.assertNotMatches('absl::*::Hash*', '_ZN4absl9HashState7combineEv')
+        self.assertMatches('**::bar', '_ZN1a1b3barEv')
+        self.assertMatches('**::bar', '_Z3barv')
+        self.assertMatches('a::**', '_ZN1a1b3barEv')
+        self.assertNotMatches('**::bar', '_ZN1a3bazEv')
+
+    def test_template_args(self):
+        push_back = '_ZNSt6vectorIiSaIiEE9push_backERKi'
+        self.assertMatches('std::vector<*>::push_back', push_back)
+        self.assertMatches('std::vector::push_back', push_back)
+        self.assertMatches('std::vector<int,std::allocator<int> >::push_back', push_back)
+        self.assertNotMatches('std::vector<char, *>::push_back', push_back)
+        self.assertMatches('foo<*>', '_Z3fooIiEvT_')
+        self.assertNotMatches('foo<char>', '_Z3fooIiEvT_')
+
+    def test_std_abbreviations(self):
+        self.assertMatches('std::allocator<*>::allocator', '_ZNSaIcEC1Ev')
+        self.assertMatches('std::allocator::~allocator', '_ZNSaIcED2Ev')
+        self.assertMatches('std::basic_string<*>::size', '_ZNKSbIwSt11char_traitsIwESaIwEE4sizeEv')
+        self.assertMatches('std::swap', '_ZSt4swapIiEvRT_S1_')
+
+    def test_special(self):
+        self.assertMatches('foo::Bar<*>', '_ZTVN3foo3BarIiEE')
+        self.assertMatches('a::f', '_ZThn16_N1a1fEv')
+        self.assertNotMatches('a::g', '_ZThn16_N1a1fEv')
+
+    def test_local_name(self):
+        self.assertMatches('foo::x', '_ZZ3foovE1x')
+        self.assertMatches('a::foo::x', '_ZZN1a3fooEvE1x')
+
+    def test_search(self):
+        symbols = ['_ZN3foo3barEv', '_ZN3foo3bazEv', '_ZN3foo3barEi']
+        self.assertEqual(list(Matcher('foo::bar').filter(symbols)),
+                         ['_ZN3foo3barEv', '_ZN3foo3barEi'])
+        self.assertEqual([str(ast) for _, ast in Matcher('foo::ba*').search(symbols)],
+                         ['foo::bar()', 'foo::baz()', 'foo::bar(int)'])
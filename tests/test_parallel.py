@@ -0,0 +1,35 @@
+import threading
+import unittest
+
+from itanium_demangler import demangle, RenderCache, _render_state
+from itanium_demangler.parallel import BatchDemangler, demangle_batch
+
+
+class TestParallel(unittest.TestCase):
+    symbols = ['_Z3foov', 'main', '_ZN1a1bEi', '_ZNSt6vectorIiSaIiEE9push_backERKi'] * 50
+
+    def test_demangle_batch(self):
+        expected = [demangle(symbol) for symbol in self.symbols]
+        self.assertEqual(demangle_batch(self.symbols, workers=4, chunk_size=7), expected)
+        self.assertEqual(demangle_batch(self.symbols, workers=2, cache_size=0), expected)
+        self.assertEqual(demangle_batch([]), [])
+
+    def test_per_thread_caches(self):
+        caches = set()
+        def render(symbol):
+            caches.add(id(_render_state.cache))
+            return demangle(symbol)
+
+        with BatchDemangler(workers=3, render=render) as demangler:
+            demangler.map(self.symbols, chunk_size=1)
+        self.assertLessEqual(len(caches), 3)
+        self.assertNotIn(id(None), caches)
+        self.assertIsNone(_render_state.cache)
+
+    def test_cache_is_thread_local(self):
+        seen = []
+        with RenderCache():
+            thread = threading.Thread(target=lambda: seen.append(_render_state.cache))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [None])
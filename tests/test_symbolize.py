@@ -0,0 +1,65 @@
+import io
+import os
+import unittest
+
+from itanium_demangler.elf import ElfFile
+from itanium_demangler.symbolize import Symbolizer, Range, perf_map_ranges, elf_ranges, \
+    load_elf
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class TestSymbolizer(unittest.TestCase):
+    def setUp(self):
+        self.symbolizer = Symbolizer([
+            (0x2000, 0x10, '_ZN1a1gEv'),
+            (0x1000, 0x20, '_Z1fv'),
+            (0x1000, 0x8, '_Z5aliasv'),
+            (0x3000, 0x10, 'main'),
+        ])
+
+    def test_lookup(self):
+        self.assertEqual(len(self.symbolizer), 3)
+        self.assertEqual(self.symbolizer.lookup(0x1010), Range(0x1000, 0x20, '_Z1fv'))
+        self.assertIsNone(self.symbolizer.lookup(0xfff))
+        self.assertIsNone(self.symbolizer.lookup(0x1020))
+        self.assertIsNone(self.symbolizer.lookup(0x4000))
+
+    def test_symbolize(self):
+        self.assertEqual(self.symbolizer.symbolize(0x1000), 'f()')
+        self.assertEqual(self.symbolizer.symbolize(0x200f), 'a::g()')
+        self.assertEqual(self.symbolizer.symbolize(0x3000), 'main')
+        self.assertIsNone(self.symbolizer.symbolize(0x2010))
+        self.assertEqual(self.symbolizer.symbolize_offset(0x2004), ('a::g()', 4))
+        self.assertIsNone(self.symbolizer.symbolize_offset(0))
+
+    def test_memoized(self):
+        first = self.symbolizer.symbolize(0x2000)
+        self.assertIs(self.symbolizer.symbolize(0x2008), first)
+
+    def test_add(self):
+        self.symbolizer.symbolize(0x1000)
+        self.symbolizer.add(0x1800, 0x10, '_ZN1aC1Ev')
+        self.assertEqual(self.symbolizer.symbolize(0x1808), 'a::{ctor}()')
+        self.assertEqual(self.symbolizer.symbolize(0x1000), 'f()')
+
+    def test_style(self):
+        symbolizer = Symbolizer([(0, 1, '_ZN1aC1Ev')], style='cxxfilt')
+        self.assertEqual(symbolizer.symbolize(0), 'a::a()')
+
+    def test_perf_map(self):
+        lines = io.StringIO('7f00 20 _Z1fv\n\n7f40 8 [unknown] stub\n')
+        self.assertEqual(list(perf_map_ranges(lines)),
+                         [(0x7f00, 0x20, '_Z1fv'), (0x7f40, 8, '[unknown] stub')])
+
+    def test_elf(self):
+        with ElfFile.open(os.path.join(FIXTURES, 'dwarf4.so')) as elf:
+            starts = {name: start for start, _, name in elf_ranges(elf)}
+        start = starts['_Z5firstRN2ns3BoxIiEE']
+        symbolizer = load_elf(os.path.join(FIXTURES, 'dwarf4.so'))
+        self.assertEqual(symbolizer.symbolize(start + 1), 'first(ns::Box<int>&)')
+
+
+if __name__ == '__main__':
+    unittest.main()